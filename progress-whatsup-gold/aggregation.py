@@ -0,0 +1,123 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import math
+import threading
+from array import array
+from .report_windows import parse_utc, format_utc, record_time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+STATISTICS = ('count', 'min', 'max', 'avg', 'p50', 'p90', 'p95', 'p99')
+
+
+def percentile(sorted_values, percent):
+    """Linear interpolation between closest ranks, matching numpy.percentile's default method."""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * percent / 100.0
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize(values, statistics):
+    """Compute the requested statistics over an array('d') of samples."""
+    if numpy is not None:
+        samples = numpy.frombuffer(values, dtype=numpy.float64)
+        computed = {'count': int(samples.size), 'min': float(samples.min()), 'max': float(samples.max()),
+                    'avg': float(samples.mean())}
+        percents = [statistic for statistic in statistics if statistic.startswith('p')]
+        if percents:
+            points = numpy.percentile(samples, [float(statistic[1:]) for statistic in percents])
+            computed.update(zip(percents, (float(point) for point in points)))
+    else:
+        ordered = sorted(values)
+        computed = {'count': len(ordered), 'min': ordered[0], 'max': ordered[-1],
+                    'avg': math.fsum(ordered) / len(ordered)}
+        computed.update({statistic: percentile(ordered, float(statistic[1:]))
+                         for statistic in statistics if statistic.startswith('p')})
+    return {statistic: computed[statistic] for statistic in statistics}
+
+
+class ReportAggregator:
+    """Reduce report records to per-device statistics, optionally downsampled into time buckets.
+
+    Samples are taken from each record's series when present, otherwise from the record itself, and are
+    held in array('d') buffers per (device, bucket) so large reports never keep the decoded records around.
+    """
+
+    def __init__(self, metric_field, statistics, bucket_seconds=None, top_n=None):
+        unknown = [statistic for statistic in statistics if statistic not in STATISTICS]
+        if unknown:
+            raise ValueError('Unknown statistics: {0}'.format(', '.join(unknown)))
+        self.metric_field = metric_field
+        self.statistics = list(statistics) or ['avg']
+        self.bucket_seconds = bucket_seconds
+        self.top_n = top_n
+        self.samples = {}
+        self.device_names = {}
+        self.sample_count = 0
+        self._lock = threading.Lock()
+
+    def _bucket(self, sample):
+        if not self.bucket_seconds:
+            return None
+        value = record_time(sample)
+        if not value:
+            return None
+        ts = parse_utc(value).timestamp()
+        return int(ts // self.bucket_seconds * self.bucket_seconds)
+
+    def add(self, records):
+        collected = []
+        for record in records:
+            device = str(record.get('id') or record.get('deviceName'))
+            for sample in record.get('series') or [record]:
+                value = sample.get(self.metric_field)
+                if value is None or value == '':
+                    continue
+                try:
+                    collected.append((device, record.get('deviceName'), self._bucket(sample), float(value)))
+                except (TypeError, ValueError):
+                    continue
+        with self._lock:
+            for device, device_name, bucket, value in collected:
+                self.device_names.setdefault(device, device_name)
+                self.samples.setdefault((device, bucket), array('d')).append(value)
+            self.sample_count += len(collected)
+
+    def result(self):
+        with self._lock:
+            rows = []
+            for (device, bucket), values in self.samples.items():
+                row = {'device_id': device, 'device_name': self.device_names.get(device),
+                       'bucket': format_utc(bucket) if bucket is not None else None}
+                row.update(summarize(values, self.statistics))
+                rows.append(row)
+            if self.top_n:
+                rank_by = self.statistics[0]
+                totals = {}
+                for (device, _), values in self.samples.items():
+                    totals.setdefault(device, array('d')).extend(values)
+                ranked = sorted(totals, key=lambda device: summarize(totals[device], [rank_by])[rank_by],
+                                reverse=True)[:self.top_n]
+                order = {device: position for position, device in enumerate(ranked)}
+                rows = [row for row in rows if row['device_id'] in order]
+                rows.sort(key=lambda row: (order[row['device_id']], row['bucket'] or ''))
+            else:
+                rows.sort(key=lambda row: (row['device_id'], row['bucket'] or ''))
+            return {
+                'metric': self.metric_field,
+                'statistics': self.statistics,
+                'bucket_seconds': self.bucket_seconds,
+                'sample_count': self.sample_count,
+                'data': rows
+            }
@@ -0,0 +1,344 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import json
+import atexit
+import asyncio
+import threading
+from time import time, perf_counter
+from functools import partial
+from contextvars import copy_context
+from concurrent.futures import Future
+from .constants import (DEFAULT_ASYNC_CONCURRENCY, DEFAULT_MAX_CONCURRENT_REQUESTS, DEFAULT_POOL_IDLE_TIMEOUT,
+                        RETRY_STATUS_CODES, STREAM_CHUNK_SIZE)
+from .compression import get_decoder
+from .coalesce import AsyncInFlightRequests
+from .cache import make_cache_key, conditional_headers
+from .metrics import metrics
+from .utils import get_config_number, parse_retry_after
+from .whatsup_gold_api_auth import TokenState
+from connectors.core.connector import get_logger, ConnectorError
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+logger = get_logger('progress-whatsup-gold')
+
+# One event loop thread per process keeps aiohttp sessions, and their keep-alive connections, across operations
+_loop = None
+_loop_lock = threading.Lock()
+_clients = {}
+
+
+def async_available():
+    """True when aiohttp is installed and the caller is not itself running inside an event loop."""
+    if aiohttp is None:
+        return False
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return True
+    return False
+
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='wug-asyncio', daemon=True).start()
+        return _loop
+
+
+async def _close_clients():
+    for client in list(_clients.values()):
+        await client.close()
+    _clients.clear()
+
+
+@atexit.register
+def close_async_clients():
+    if _loop is not None and _loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_close_clients(), _loop).result(timeout=5)
+        except Exception as err:
+            logger.debug('Unable to close the asyncio clients: {0}'.format(err))
+
+
+def client_settings(wg, config):
+    concurrency = get_config_number(config, 'async_concurrency', DEFAULT_ASYNC_CONCURRENCY)
+    max_in_flight = get_config_number(config, 'max_concurrent_requests', DEFAULT_MAX_CONCURRENT_REQUESTS)
+    if max_in_flight > 0:
+        concurrency = min(concurrency, max_in_flight)
+    idle_timeout = get_config_number(config, 'pool_idle_timeout', DEFAULT_POOL_IDLE_TIMEOUT)
+    return wg.server_url, bool(wg.verify_ssl), max(concurrency, 1), idle_timeout
+
+
+def query_params(params):
+    return {str(key): str(value) for key, value in (params or {}).items() if value is not None}
+
+
+def error_message(status, reason, body):
+    try:
+        err_resp = json.loads(body) if body else None
+    except ValueError:
+        err_resp = None
+    if isinstance(err_resp, dict) and 'error_description' in err_resp:
+        failure_msg = err_resp.get('error_description')
+    elif isinstance(err_resp, dict) and isinstance(err_resp.get('error'), dict):
+        failure_msg = err_resp.get('error').get('message')
+    else:
+        return '{0}: {1}'.format(status, reason)
+    return 'Response {0}: {1} Error Message: {2}'.format(status, reason, failure_msg if failure_msg else '')
+
+
+async def read_body(response):
+    """Read and decompress the body chunk by chunk; returns (decoded body, bytes received over the wire)."""
+    decoder = get_decoder(response.headers.get('Content-Encoding'))
+    chunks, transferred = [], 0
+    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+        transferred += len(chunk)
+        chunks.append(decoder.decompress(chunk) if decoder is not None else chunk)
+    if decoder is not None:
+        chunks.append(decoder.flush())
+    return b''.join(chunks), transferred
+
+
+class AsyncWhatsUpGold:
+    """Asyncio counterpart of ProgressWhatsUpGold.make_rest_call.
+
+    Shares the synchronous client's settings, token state, response cache, governor and metrics; requests go
+    through one aiohttp connection pool per configuration, holding at most concurrency connections. The
+    server's governor caps requests in flight across this client and the synchronous one.
+    """
+
+    def __init__(self, wg, config):
+        self.wg = wg
+        self.settings = client_settings(wg, config)
+        _, _, self.concurrency, self.idle_timeout = self.settings
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=self.idle_timeout,
+                                         ssl=None if wg.verify_ssl else False)
+        # Bodies are decompressed by read_body, which also counts the compressed bytes
+        self.session = aiohttp.ClientSession(connector=connector, auto_decompress=False)
+        self.token_lock = asyncio.Lock()
+        self.in_flight = AsyncInFlightRequests()
+        # Operations currently using this client, and whether get_async_client has replaced it
+        self.active = 0
+        self.retired = False
+
+    async def close(self):
+        await self.session.close()
+
+    async def authorization(self, config):
+        auth = self.wg.wg_auth
+        token_state = auth._adopt_shared_token(config, TokenState.from_config(config))
+        if config.get('accessToken') and not token_state.is_expired(time()):
+            if token_state.is_expired(time(), auth.refresh_skew):
+                auth._refresh_in_background(config, self.wg.connector_info, token_state)
+            return 'Bearer {0}'.format(config['accessToken'])
+        async with self.token_lock:
+            # validate_token refreshes under the process-wide refresh lock; keep that blocking work off the loop
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, auth.validate_token, config, self.wg.connector_info)
+
+    async def cache_io(self, func, *args):
+        """Call a response cache method, off the event loop when it may block on the disk cache."""
+        if self.wg.disk_cache is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, partial(copy_context().run, func, *args))
+
+    async def make_rest_call(self, config, endpoint=None, params=None, cache_ttl=None, bypass_cache=False,
+                             stream=False):
+        # stream marks report pages, which the synchronous client never revalidates either
+        conditional = self.wg.conditional_requests and not stream
+        cache_key = make_cache_key(self.wg.cache_scope, endpoint, params)
+        if cache_ttl and not bypass_cache:
+            cached = await self.cache_io(self.wg.cached_response, cache_key, endpoint)
+            if cached is not None:
+                return cached
+        call = partial(self._make_rest_call, config, endpoint, params, cache_key if conditional else None)
+        if self.wg.coalesce_requests:
+            resp = await self.in_flight.run(cache_key, call)
+        else:
+            resp = await call()
+        if cache_ttl:
+            await self.cache_io(self.wg.store_response, cache_key, resp, cache_ttl)
+        return resp
+
+    async def _make_rest_call(self, config, endpoint, params, conditional_key=None):
+        timings = {}
+        started = perf_counter()
+        headers = {'Authorization': await self.authorization(config), 'Accept': 'application/json',
+                   'Accept-Encoding': self.wg.accept_encoding}
+        validators = await self.cache_io(self.wg.stored_validators, conditional_key) if conditional_key else None
+        if validators:
+            headers.update(conditional_headers(validators))
+        timings['auth'] = perf_counter() - started
+        service_url = f'{self.wg.server_url}/api/v1/{endpoint}'
+        logger.debug('Request URL {0}'.format(service_url))
+        attempt = 0
+        metrics.increment('requests')
+        while True:
+            connect_timeout, read_timeout = self.wg._request_timeout()
+            timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            try:
+                async with self.wg.governor.async_slot() as queue_wait:
+                    started = perf_counter()
+                    async with self.session.get(service_url, params=query_params(params), headers=headers,
+                                                timeout=timeout) as response:
+                        timings['ttfb'] = perf_counter() - started
+                        started = perf_counter()
+                        body, transferred = await read_body(response)
+                        timings['download'] = perf_counter() - started
+                timings['queue'] = timings.get('queue', 0.0) + queue_wait
+                metrics.increment('bytes_received', len(body))
+                metrics.increment('bytes_transferred', transferred)
+            except aiohttp.ClientSSLError:
+                logger.error('An SSL error occurred')
+                raise ConnectorError('An SSL error occurred')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as err:
+                if attempt >= self.wg.max_retries:
+                    error_msg = ('The request timed out' if isinstance(err, asyncio.TimeoutError)
+                                 else 'A connection error occurred')
+                    logger.error(error_msg)
+                    raise ConnectorError(error_msg)
+                await asyncio.sleep(self.wg.backoff_delay(attempt, None, err))
+                attempt += 1
+                continue
+            if response.status in RETRY_STATUS_CODES and attempt < self.wg.max_retries:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                reason = '{0}: {1}'.format(response.status, response.reason)
+                await asyncio.sleep(self.wg.backoff_delay(attempt, retry_after, reason))
+                attempt += 1
+                continue
+            break
+        if response.status == 304 and validators:
+            logger.debug('Not modified, using the stored response for {0}'.format(endpoint))
+            metrics.increment('not_modified')
+            metrics.observe_request(endpoint, response.status, timings)
+            return validators['body']
+        if response.status < 400:
+            result = body
+            if body and 'application/json' in (response.headers.get('Content-Type') or ''):
+                started = perf_counter()
+                result = json.loads(body)
+                timings['decode'] = perf_counter() - started
+                if conditional_key:
+                    await self.cache_io(self.wg.store_validators, conditional_key, response.headers, result)
+            metrics.observe_request(endpoint, response.status, timings)
+            return result
+        metrics.observe_request(endpoint, response.status, timings)
+        if response.status == 404:
+            return {"message": "Not Found"}
+        metrics.increment('errors')
+        error_msg = error_message(response.status, response.reason, body)
+        logger.error(error_msg)
+        raise ConnectorError(error_msg)
+
+
+async def get_async_client(wg, config):
+    """Return the event loop's client for wg's configuration, keyed like operations.get_client.
+
+    A client serves exactly one ProgressWhatsUpGold instance, so requests never pick up another configuration's
+    credentials, caches or connector_info. It is replaced when that instance or the pool settings change; the old
+    one is closed once the requests already running on it finish.
+    """
+    client = _clients.get(wg.client_key)
+    if client is not None and client.wg is wg and client.settings == client_settings(wg, config):
+        return client
+    if client is not None:
+        client.retired = True
+        if not client.active:
+            await client.close()
+    client = _clients[wg.client_key] = AsyncWhatsUpGold(wg, config)
+    return client
+
+
+async def fetch_pages(client, config, endpoint, params, **options):
+    """Asyncio counterpart of operations.fetch_pages; report pages are decoded whole rather than streamed."""
+    params = dict(params)
+    fetch_all_pages = params.pop('fetch_all_pages', False)
+    max_pages = params.pop('max_pages', None)
+    max_items = params.pop('max_items', None)
+    if not fetch_all_pages:
+        return await client.make_rest_call(config, endpoint=endpoint, params=params, **options)
+    result = {'paging': {'pageId': params.get('pageId'), 'nextPageId': None, 'size': 0, 'pageCount': 0}, 'data': []}
+    seen_page_ids = {params.get('pageId')}
+    while True:
+        resp = await client.make_rest_call(config, endpoint=endpoint, params=params, **options)
+        if not isinstance(resp, dict) or 'data' not in resp:
+            return resp if result['paging']['pageCount'] == 0 else result
+        result['paging']['pageCount'] += 1
+        next_page_id = resp.get('paging', {}).get('nextPageId')
+        result['paging']['nextPageId'] = next_page_id
+        result['data'].extend(resp.get('data') or [])
+        if max_items and len(result['data']) >= max_items:
+            del result['data'][max_items:]
+            break
+        if not next_page_id or (max_pages and result['paging']['pageCount'] >= max_pages):
+            break
+        if next_page_id in seen_page_ids:
+            logger.warning('{0} returned page {1} again, stopping pagination'.format(endpoint, next_page_id))
+            break
+        seen_page_ids.add(next_page_id)
+        params['pageId'] = next_page_id
+    result['paging']['size'] = len(result['data'])
+    return result
+
+
+async def execute_request(client, config, endpoint, params, paged, options):
+    options = dict(options)
+    if paged:
+        return await fetch_pages(client, config, endpoint, params, **options)
+    return await client.make_rest_call(config, endpoint=endpoint, **options)
+
+
+async def gather_requests(wg, config, request_specs):
+    client = await get_async_client(wg, config)
+    keys = list(request_specs)
+    client.active += 1
+    try:
+        outcomes = await asyncio.gather(*(execute_request(client, config, *request_specs[key]) for key in keys),
+                                        return_exceptions=True)
+    finally:
+        client.active -= 1
+        if client.retired and not client.active:
+            await client.close()
+    results, errors = {}, {}
+    for key, outcome in zip(keys, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error('{0}: {1}'.format(key, outcome))
+            errors[key] = str(outcome)
+        else:
+            results[key] = outcome
+    return results, errors
+
+
+def run_requests(wg, config, request_specs):
+    """Run (endpoint, params, paged, options) request descriptions on the shared event loop; results and errors
+    are keyed like request_specs. Blocks the calling thread, which keeps its operation deadline and metrics context."""
+    loop = _get_loop()
+    future = Future()
+
+    def start():
+        task = loop.create_task(gather_requests(wg, config, request_specs))
+
+        def done(task):
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+        task.add_done_callback(done)
+
+    loop.call_soon_threadsafe(start, context=copy_context())
+    return future.result()
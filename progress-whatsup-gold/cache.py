@@ -0,0 +1,99 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import hashlib
+import threading
+from copy import deepcopy
+from time import monotonic
+from collections import OrderedDict
+from .constants import DEFAULT_CACHE_MAX_SIZE
+
+_MISSING = object()
+
+
+def account_scope(server_url, username):
+    """Identify the WhatsUp Gold account on a server; responses are only shared between callers using it."""
+    digest = hashlib.sha256('{0}\n{1}'.format(server_url, username or '').encode()).hexdigest()[:16]
+    return '{0}#{1}'.format(server_url, digest)
+
+
+def make_cache_key(scope, endpoint, params=None):
+    """Key a GET by the account_scope() it is sent with, so configurations using other accounts never see it."""
+    normalized = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return scope, endpoint, normalized
+
+
+def validator_key(cache_key):
+    """Key of the conditional-request entry for cache_key when it is kept in the disk cache."""
+    return ('validators',) + tuple(cache_key)
+
+
+def validator_entry(response_headers, resp):
+    """Return the entry stored for conditional requests, or None when the response carries no validators."""
+    etag, last_modified = response_headers.get('ETag'), response_headers.get('Last-Modified')
+    if not isinstance(resp, dict) or not (etag or last_modified):
+        return None
+    return {'etag': etag, 'last_modified': last_modified, 'body': resp}
+
+
+def conditional_headers(entry):
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+class TTLCache:
+
+    def __init__(self, max_size=DEFAULT_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return deepcopy(entry[1])
+            if entry is not _MISSING:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl):
+        if not ttl or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (monotonic() + ttl, deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def resize(self, max_size):
+        with self._lock:
+            self.max_size = max_size
+            while len(self._entries) > max(max_size, 0):
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+
+response_cache = TTLCache()
+# Last response and its ETag/Last-Modified per GET, kept past the response TTL to revalidate with the server
+validator_cache = TTLCache()
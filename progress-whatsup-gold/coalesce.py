@@ -0,0 +1,93 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import asyncio
+import threading
+from copy import deepcopy
+from .metrics import metrics
+from .utils import remaining_time
+from connectors.core.connector import ConnectorError
+
+
+class _Flight:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InFlightRequests:
+    """Share one upstream call between threads asking for the same key at the same time.
+
+    The first caller runs the request; callers arriving before it finishes wait and receive a copy of its
+    result, or the same exception. Nothing is kept once the call completes, so this never serves stale data.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, call):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            return self._wait(flight)
+        try:
+            flight.result = call()
+            return flight.result
+        except BaseException as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    @staticmethod
+    def _wait(flight):
+        metrics.increment('coalesced_requests')
+        if not flight.done.wait(remaining_time()):
+            raise ConnectorError('The operation deadline was exceeded while waiting for an identical request')
+        if flight.error is not None:
+            raise flight.error
+        return deepcopy(flight.result)
+
+
+class AsyncInFlightRequests:
+    """InFlightRequests for coroutines on one event loop."""
+
+    def __init__(self):
+        self._flights = {}
+
+    async def run(self, key, call):
+        future = self._flights.get(key)
+        if future is not None:
+            metrics.increment('coalesced_requests')
+            # shield: a cancelled follower must not cancel the leader's request
+            return deepcopy(await asyncio.shield(future))
+        future = self._flights[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await call()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            # Retrieve the exception so an unawaited future does not log "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._flights[key]
+
+
+in_flight_requests = InFlightRequests()
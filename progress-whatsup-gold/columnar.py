@@ -0,0 +1,101 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+COLUMNAR_FORMAT = 'columnar'
+
+
+def _dictionary_encode(values):
+    """Return (dictionary, indexes) when the column is all strings repeated often enough to be worth it."""
+    present = [value for value in values if value is not None]
+    if not present or not all(isinstance(value, str) for value in present):
+        return None
+    dictionary, positions, indexes = [], {}, []
+    for value in values:
+        if value is None:
+            indexes.append(-1)
+            continue
+        position = positions.get(value)
+        if position is None:
+            position = positions[value] = len(dictionary)
+            dictionary.append(value)
+        indexes.append(position)
+    if len(dictionary) * 2 > len(present):
+        return None
+    return dictionary, indexes
+
+
+def to_columnar(records):
+    """Convert a list of dicts into one array per field, dictionary-encoding repetitive string fields.
+
+    Fields missing from some records are listed under absent by row index, so from_columnar restores
+    the original records exactly.
+    """
+    fields = []
+    seen = set()
+    for record in records:
+        for field in record:
+            if field not in seen:
+                seen.add(field)
+                fields.append(field)
+    columns, dictionaries, absent = {}, {}, {}
+    for field in fields:
+        values, missing = [], []
+        for row, record in enumerate(records):
+            if field in record:
+                values.append(record[field])
+            else:
+                values.append(None)
+                missing.append(row)
+        if missing:
+            absent[field] = missing
+        encoded = _dictionary_encode(values)
+        if encoded is not None:
+            dictionaries[field], values = encoded
+        columns[field] = values
+    table = {'format': COLUMNAR_FORMAT, 'length': len(records), 'fields': fields, 'columns': columns}
+    if dictionaries:
+        table['dictionaries'] = dictionaries
+    if absent:
+        table['absent'] = absent
+    return table
+
+
+def from_columnar(table):
+    """Rebuild the list of dicts encoded by to_columnar."""
+    dictionaries = table.get('dictionaries') or {}
+    absent = {field: set(rows) for field, rows in (table.get('absent') or {}).items()}
+    records = [{} for _ in range(table.get('length', 0))]
+    for field in table.get('fields') or []:
+        dictionary = dictionaries.get(field)
+        missing = absent.get(field, ())
+        for row, value in enumerate(table['columns'][field]):
+            if row in missing:
+                continue
+            if dictionary is not None:
+                value = dictionary[value] if value >= 0 else None
+            records[row][field] = value
+    return records
+
+
+def is_record_list(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(item, dict) for item in value)
+
+
+def columnar_result(result):
+    """Convert the data records of an operation result in place, including per-device and per-report results."""
+    if not isinstance(result, dict):
+        return result
+    data = result.get('data')
+    if isinstance(data, dict):
+        for value in data.values():
+            columnar_result(value)
+    elif is_record_list(data):
+        for item in data:
+            if is_record_list(item.get('data')):
+                columnar_result(item)
+        result['data'] = to_columnar(data)
+    return result
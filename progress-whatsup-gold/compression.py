@@ -0,0 +1,69 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# Brotli is only advertised when a decoder is installed; urllib3 uses the same packages to decode it
+ACCEPT_ENCODING = 'gzip, deflate, br' if brotli is not None else 'gzip, deflate'
+IDENTITY = 'identity'
+
+
+def accept_encoding(config):
+    return ACCEPT_ENCODING if config.get('compress_responses', True) is not False else IDENTITY
+
+
+class _ZlibDecoder:
+
+    def __init__(self):
+        # 32 + MAX_WBITS accepts both gzip and zlib headers; fall back to raw deflate for servers that omit it
+        self._decoder = zlib.decompressobj(32 + zlib.MAX_WBITS)
+        self._first = True
+
+    def decompress(self, chunk):
+        if self._first and chunk:
+            self._first = False
+            try:
+                return self._decoder.decompress(chunk)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(chunk)
+
+    def flush(self):
+        return self._decoder.flush()
+
+
+class _BrotliDecoder:
+
+    def __init__(self):
+        self._decoder = brotli.Decompressor()
+
+    def decompress(self, chunk):
+        process = getattr(self._decoder, 'process', None) or self._decoder.decompress
+        return process(chunk)
+
+    def flush(self):
+        return b''
+
+
+def get_decoder(content_encoding):
+    """Return an incremental decoder for a Content-Encoding header, or None when the body is not compressed."""
+    encoding = (content_encoding or '').strip().lower()
+    if encoding in ('', IDENTITY):
+        return None
+    if encoding in ('gzip', 'x-gzip', 'deflate'):
+        return _ZlibDecoder()
+    if encoding == 'br' and brotli is not None:
+        return _BrotliDecoder()
+    raise ValueError('Unsupported Content-Encoding: {0}'.format(content_encoding))
@@ -7,6 +7,8 @@ Copyright end
 
 from connectors.core.connector import Connector, get_logger, ConnectorError
 from .operations import check_health_ex, operations
+from .utils import operation_deadline
+from .metrics import collect_operation_metrics
 
 logger = get_logger('progress-whatsup-gold')
 
@@ -20,7 +22,11 @@ class ProgressWhatsUpGold(Connector):
         except Exception as err:
             logger.exception(err)
             raise ConnectorError(err)
-        return operation(config, params)
+        with operation_deadline(config), collect_operation_metrics() as timing_summary:
+            result = operation(config, params)
+        if config.get('include_timing') and isinstance(result, dict):
+            result['_timing'] = timing_summary.to_dict()
+        return result
 
     def check_health(self, config):
         logger.info('starting health check')
@@ -14,6 +14,27 @@ endpoints = {
     "State Change Timeline Report": 'state-change'
 }
 
+device_facets = {
+    "Overview": 'overview',
+    "Summary": 'summary',
+    "Polling Configuration": 'polling_configuration',
+    "Group Assignments": 'groups',
+    "Monitors": 'monitors',
+    "Attributes": 'attributes'
+}
+
+device_endpoints = {
+    'overview': 'devices/{device_id}',
+    'summary': 'devices/{device_id}/config/template',
+    'polling_configuration': 'devices/{device_id}/config/polling',
+    'groups': 'devices/{device_id}/group/-',
+    'monitors': 'devices/{device_id}/monitors/-',
+    'attributes': 'devices/{device_id}/attributes/-'
+}
+
+# Device endpoints returning paged lists; the device 360 operation fetches them in full
+PAGED_DEVICE_FACETS = ('groups', 'monitors', 'attributes')
+
 report_duration = {
     "Today": "today",
     "Last Polled": "lastPolled",
@@ -32,3 +53,100 @@ report_duration = {
     "Last X Months": "lastNMonths",
     "Custom Duration": "custom"
 }
+
+output_formats = {
+    "Records": 'records',
+    "Columnar": 'columnar'
+}
+
+aggregation_statistics = {
+    "Count": 'count',
+    "Minimum": 'min',
+    "Maximum": 'max',
+    "Average": 'avg',
+    "50th Percentile": 'p50',
+    "90th Percentile": 'p90',
+    "95th Percentile": 'p95',
+    "99th Percentile": 'p99'
+}
+
+aggregation_buckets = {
+    "5 Minutes": 300,
+    "15 Minutes": 900,
+    "Hour": 3600,
+    "Day": 86400,
+    "Week": 604800
+}
+
+# Streamed report records handed to the aggregator at a time
+AGGREGATION_BATCH_SIZE = 1000
+
+# Sample field aggregated by default for each report endpoint
+REPORT_METRIC_FIELDS = {
+    'cpu-utilization': 'avgPercent',
+    'disk-utilization': 'avgPercent',
+    'memory-utilization': 'avgPercent',
+    'ping-availability': 'percentAvailable',
+    'ping-response-time': 'avgMilliSec'
+}
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_POOL_IDLE_TIMEOUT = 300
+DEFAULT_MAX_WORKERS = 10
+
+DEFAULT_CACHE_MAX_SIZE = 1024
+# Persistent response cache shared by worker processes, in megabytes of stored responses
+DEFAULT_DISK_CACHE_MAX_SIZE_MB = 64
+# Seconds a worker waits for another process holding the disk cache write lock
+DISK_CACHE_BUSY_TIMEOUT = 5
+# Seconds the last response and its validators are kept for conditional GETs
+VALIDATOR_CACHE_TTL = 86400
+
+# Response cache TTLs in seconds for operations whose data changes rarely
+CACHE_TTL = {
+    'get_device_overview': 60,
+    'get_device_summary': 300,
+    'get_device_polling_configuration': 300,
+    'get_device_groups': 300
+}
+
+# Seconds before expiry at which the access token is refreshed in the background
+DEFAULT_TOKEN_REFRESH_SKEW = 60
+
+# Bytes read per chunk when decoding report responses incrementally
+STREAM_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 60
+DEFAULT_OPERATION_TIMEOUT = 300
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+MAX_BACKOFF_SECONDS = 30
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+
+# Client-side throttling per WhatsUp Gold server; 0 disables the limit
+DEFAULT_RATE_LIMIT = 0
+DEFAULT_MAX_CONCURRENT_REQUESTS = 0
+
+# Device listing used by the inventory snapshot and the device resolver
+DEFAULT_ROOT_GROUP_ID = '0'
+DEVICE_LIST_PAGE_SIZE = 500
+# Overview fields whose change triggers a re-fetch of the device's groups and polling configuration
+INVENTORY_FINGERPRINT_FIELDS = ('name', 'hostName', 'networkAddress', 'description', 'role', 'brand', 'os', 'notes')
+# Seconds after which unchanged devices' groups and polling configuration are fetched again (conditionally)
+DEFAULT_INVENTORY_DETAILS_MAX_AGE = 3600
+
+# Requests kept in flight by the asyncio client when aiohttp is installed
+DEFAULT_ASYNC_CONCURRENCY = 100
+
+# Seconds before the hostname/IP to device ID index is rebuilt from the device listing
+DEFAULT_RESOLVER_TTL = 300
+RESOLVER_OUTPUT_FIELDS = ('id', 'name', 'hostName', 'networkAddress')
+
+# Custom report ranges longer than the window are split into grid-aligned windows fetched in parallel; 0 disables
+DEFAULT_REPORT_WINDOW_MINUTES = 0
+# Windows ending this many seconds before now are considered complete and are cached
+REPORT_WINDOW_SETTLE_SECONDS = 300
+REPORT_WINDOW_CACHE_TTL = 3600
+# Record fields holding the sample or event time, used to order merged report windows
+REPORT_TIME_FIELDS = ('pollTimeUtc', 'startTimeUtc')
@@ -0,0 +1,96 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import json
+import hashlib
+from .report_windows import parse_utc, record_time
+from .snapshots import JSONSnapshot, default_snapshot_path, get_snapshot
+
+
+def record_key(record):
+    return hashlib.sha1(json.dumps(record, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def record_timestamp(record):
+    value = record_time(record)
+    try:
+        return parse_utc(value).timestamp() if value else None
+    except ValueError:
+        return None
+
+
+def default_cursor_path(server_url):
+    return default_snapshot_path('wug-report-cursors', server_url, '.json')
+
+
+class CursorStore(JSONSnapshot):
+    """Last-seen report timestamp per device and report type, persisted as JSON so polling survives restarts.
+
+    Each cursor keeps the keys of the records seen at its timestamp; the next poll starts at that timestamp
+    inclusively and drops those records, so events sharing the boundary second are neither lost nor repeated.
+    """
+
+    description = 'report cursors'
+
+    def __init__(self, server_url, path):
+        super().__init__(server_url, path)
+        self.cursors = {}
+
+    @staticmethod
+    def cursor_id(device_id, report_type):
+        return '{0}/{1}'.format(device_id, report_type)
+
+    def to_snapshot(self):
+        return {'cursors': self.cursors}
+
+    def from_snapshot(self, snapshot):
+        self.cursors = snapshot.get('cursors', {})
+
+    def get(self, device_id, report_type):
+        with self.lock:
+            self.load()
+            return self.cursors.get(self.cursor_id(device_id, report_type))
+
+    def reset(self, device_id, report_type):
+        with self.lock:
+            self.load()
+            if self.cursors.pop(self.cursor_id(device_id, report_type), None) is not None:
+                self.save()
+
+    def advance(self, device_id, report_type, records):
+        """Return the records newer than the cursor and move the cursor to the latest of them."""
+        with self.lock:
+            self.load()
+            cursor_id = self.cursor_id(device_id, report_type)
+            cursor = self.cursors.get(cursor_id) or {}
+            last_seen = cursor.get('last_seen')
+            boundary_keys = set(cursor.get('boundary_keys') or [])
+            latest, latest_utc, latest_keys = last_seen, cursor.get('last_seen_utc'), set(boundary_keys)
+            new_records = []
+            for record in records:
+                timestamp = record_timestamp(record)
+                if timestamp is None:
+                    continue
+                key = record_key(record)
+                if last_seen is not None and (timestamp < last_seen or
+                                              (timestamp == last_seen and key in boundary_keys)):
+                    continue
+                new_records.append(record)
+                if latest is None or timestamp > latest:
+                    latest, latest_utc, latest_keys = timestamp, record_time(record), {key}
+                elif timestamp == latest:
+                    latest_keys.add(key)
+            if new_records:
+                self.cursors[cursor_id] = {'last_seen': latest, 'last_seen_utc': latest_utc,
+                                           'boundary_keys': sorted(latest_keys)}
+                self.save()
+            new_records.sort(key=record_timestamp)
+            return new_records, self.cursors.get(cursor_id)
+
+
+def get_cursor_store(server_url, path=None):
+    return get_snapshot(CursorStore, server_url, path or default_cursor_path(server_url))
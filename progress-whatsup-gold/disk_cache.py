@@ -0,0 +1,185 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from time import time
+from .constants import DEFAULT_DISK_CACHE_MAX_SIZE_MB, DISK_CACHE_BUSY_TIMEOUT
+from .utils import get_config_number, private_temp_dir
+from connectors.core.connector import get_logger
+
+logger = get_logger('progress-whatsup-gold')
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires);
+'''
+
+
+def default_disk_cache_path(scope):
+    """One database per account_scope(), so no other account's responses are ever read from the file."""
+    digest = hashlib.sha1(scope.encode()).hexdigest()[:12]
+    return os.path.join(private_temp_dir(), 'wug-response-cache-{0}.sqlite3'.format(digest))
+
+
+def disk_key(cache_key):
+    return json.dumps(cache_key, separators=(',', ':'))
+
+
+class DiskCache:
+    """Response cache in a SQLite database in WAL mode, shared by every worker process on the host.
+
+    Entries expire by wall-clock time, and the least recently read entries are evicted once the stored
+    responses exceed max_bytes. Lookups only read: their access times are batched and written with the next
+    set, which already holds the write lock. Errors from the database are logged and treated as misses, so a
+    locked or corrupt cache file slows operations down but never fails them. The database is created 0600;
+    SQLite gives its -wal and -shm files the same mode.
+    """
+
+    def __init__(self, path, max_bytes):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._accessed = {}
+
+    def _connect(self):
+        # sqlite3 connections may not be shared between threads; keep one per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, mode=0o700, exist_ok=True)
+            os.close(os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600))
+            connection = sqlite3.connect(self.path, timeout=DISK_CACHE_BUSY_TIMEOUT, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _count(self, hit, key=None, now=None):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self._accessed[key] = now
+            else:
+                self.misses += 1
+
+    def _pop_accessed(self):
+        with self._lock:
+            accessed, self._accessed = self._accessed, {}
+        return [(now, key) for key, now in accessed.items()]
+
+    def lookup(self, cache_key):
+        """Return (value, seconds to expiry) for a live entry, else None."""
+        key = disk_key(cache_key)
+        now = time()
+        try:
+            row = self._connect().execute('SELECT value, expires FROM responses WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[1] > now:
+                self._count(True, key, now)
+                return json.loads(row[0]), row[1] - now
+        except (sqlite3.Error, OSError, ValueError) as err:
+            logger.warning('Disk cache lookup failed: {0}'.format(err))
+        self._count(False)
+        return None
+
+    def get(self, cache_key, default=None):
+        entry = self.lookup(cache_key)
+        return default if entry is None else entry[0]
+
+    def set(self, cache_key, value, ttl):
+        if not ttl or self.max_bytes <= 0:
+            return
+        blob = json.dumps(value, separators=(',', ':')).encode('utf-8')
+        if len(blob) > self.max_bytes:
+            return
+        now = time()
+        try:
+            connection = self._connect()
+            # BEGIN IMMEDIATE takes the write lock up front, so concurrent processes evict one at a time
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('INSERT OR REPLACE INTO responses (key, value, size, expires, accessed) '
+                                   'VALUES (?, ?, ?, ?, ?)', (disk_key(cache_key), blob, len(blob), now + ttl, now))
+                connection.executemany('UPDATE responses SET accessed = ? WHERE key = ?', self._pop_accessed())
+                self._evict(connection, now)
+                connection.execute('COMMIT')
+            except BaseException:
+                connection.execute('ROLLBACK')
+                raise
+        except (sqlite3.Error, OSError) as err:
+            logger.warning('Disk cache write failed: {0}'.format(err))
+
+    def _evict(self, connection, now):
+        connection.execute('DELETE FROM responses WHERE expires <= ?', (now,))
+        total = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        oldest = []
+        for key, size in connection.execute('SELECT key, size FROM responses ORDER BY accessed'):
+            oldest.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        connection.executemany('DELETE FROM responses WHERE key = ?', oldest)
+
+    def clear(self):
+        try:
+            self._connect().execute('DELETE FROM responses')
+        except (sqlite3.Error, OSError) as err:
+            logger.warning('Disk cache clear failed: {0}'.format(err))
+
+    def stats(self):
+        stats = {'path': self.path, 'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses}
+        try:
+            stats['size'], stats['bytes'] = self._connect().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE expires > ?', (time(),)).fetchone()
+        except (sqlite3.Error, OSError) as err:
+            logger.warning('Disk cache stats failed: {0}'.format(err))
+        return stats
+
+
+def get_disk_cache(config, scope):
+    """Return the shared DiskCache for the configured path, or for scope's default path, or None when disabled."""
+    if not config.get('disk_cache'):
+        return None
+    try:
+        path = config.get('disk_cache_path') or default_disk_cache_path(scope)
+    except OSError as err:
+        logger.warning('Disk cache disabled: {0}'.format(err))
+        return None
+    max_bytes = get_config_number(config, 'disk_cache_max_size', DEFAULT_DISK_CACHE_MAX_SIZE_MB) * 1024 * 1024
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = DiskCache(path, max_bytes)
+        cache.max_bytes = max_bytes
+        return cache
+
+
+def get_disk_cache_stats():
+    with _caches_lock:
+        return [cache.stats() for cache in _caches.values()]
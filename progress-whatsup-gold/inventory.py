@@ -0,0 +1,104 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import json
+import hashlib
+from time import time
+from .constants import INVENTORY_FINGERPRINT_FIELDS
+from .snapshots import JSONSnapshot, default_snapshot_path, get_snapshot
+
+
+def device_fingerprint(overview):
+    values = [overview.get(field) for field in INVENTORY_FINGERPRINT_FIELDS]
+    return hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()
+
+
+def default_inventory_path(server_url):
+    return default_snapshot_path('wug-inventory', server_url, '.json.gz')
+
+
+class DeviceInventory(JSONSnapshot):
+    """Snapshot of every device's overview, groups and polling configuration, persisted as gzip-compressed JSON."""
+
+    description = 'inventory snapshot'
+    compressed = True
+
+    def __init__(self, server_url, path):
+        super().__init__(server_url, path)
+        self.devices = {}
+        self.built_at = None
+
+    def to_snapshot(self):
+        return {'built_at': self.built_at, 'devices': self.devices}
+
+    def from_snapshot(self, snapshot):
+        self.devices = snapshot.get('devices', {})
+        self.built_at = snapshot.get('built_at')
+
+    def refresh(self, overviews, fetch_details, full_refresh=False, max_age=None):
+        """Merge a fresh device listing, fetching details for new devices, devices whose fingerprint changed and,
+        when max_age is set, devices whose details were fetched more than max_age seconds ago.
+
+        Group moves and polling changes do not alter the overview fingerprint, so max_age bounds how stale they
+        can get. fetch_details(device_ids) must return (details, errors) dicts keyed by device ID.
+        """
+        with self.lock:
+            self.load()
+            ts_now = time()
+            listed = {str(overview.get('id')): overview for overview in overviews if overview.get('id') is not None}
+            removed = [device_id for device_id in self.devices if device_id not in listed]
+            changed, added, stale = [], [], []
+            for device_id, overview in listed.items():
+                record = self.devices.get(device_id)
+                fingerprint = device_fingerprint(overview)
+                if record is None:
+                    added.append(device_id)
+                elif full_refresh or record.get('fingerprint') != fingerprint or record.get('error'):
+                    changed.append(device_id)
+                elif max_age and ts_now - (record.get('updated_at') or 0) >= max_age:
+                    stale.append(device_id)
+            fetch_ids = added + changed + stale
+            details, errors = fetch_details(fetch_ids) if fetch_ids else ({}, {})
+            for device_id in removed:
+                del self.devices[device_id]
+            for device_id, overview in listed.items():
+                record = self.devices.setdefault(device_id, {})
+                record['overview'] = overview
+                if device_id in details:
+                    record.update(details[device_id])
+                    record['fingerprint'] = device_fingerprint(overview)
+                    record['updated_at'] = ts_now
+                    record.pop('error', None)
+                elif device_id in errors:
+                    record['error'] = errors[device_id]
+            self.built_at = ts_now
+            self.save()
+            return {
+                'device_count': len(self.devices),
+                'added': len(added),
+                'updated': len(changed),
+                'revalidated': len(stale),
+                'removed': len(removed),
+                'unchanged': len(listed) - len(fetch_ids),
+                'errors': errors,
+                'built_at': self.built_at,
+                'path': self.path
+            }
+
+    def get(self, device_id):
+        with self.lock:
+            self.load()
+            return self.devices.get(str(device_id))
+
+    def all(self):
+        with self.lock:
+            self.load()
+            return dict(self.devices)
+
+
+def get_inventory(server_url, path=None):
+    return get_snapshot(DeviceInventory, server_url, path or default_inventory_path(server_url))
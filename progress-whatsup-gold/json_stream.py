@@ -0,0 +1,118 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import json
+import codecs
+
+WHITESPACE = ' \t\n\r'
+DELIMITERS = ',:]}' + WHITESPACE
+
+
+class JSONArrayStream:
+    """Incrementally decode a top-level JSON object, yielding the elements of one array member as they arrive.
+
+    The other top-level members (e.g. paging) are collected in ``fields`` and are complete once iteration ends.
+    """
+
+    def __init__(self, chunks, array_key='data', on_close=None):
+        self.array_key = array_key
+        self.fields = {}
+        self._chunks = iter(chunks)
+        self._on_close = on_close
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._records = self._parse()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._records)
+
+    def close(self):
+        self._records.close()
+        # A generator closed before its first item never runs its finally block
+        self._finish()
+
+    def _finish(self):
+        on_close, self._on_close = self._on_close, None
+        if on_close:
+            on_close()
+
+    def _read(self):
+        for chunk in self._chunks:
+            text = self._text_decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+            if text:
+                self._buffer = self._buffer[self._pos:] + text
+                self._pos = 0
+                return True
+        self._buffer = self._buffer[self._pos:] + self._text_decoder.decode(b'', final=True)
+        self._pos = 0
+        self._eof = True
+        return False
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof or not self._read():
+                return ''
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError('Invalid JSON: expected {0!r} at offset {1}'.format(char, self._pos))
+        self._pos += 1
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+                # A number cut at the chunk boundary decodes early, so require a delimiter after the value
+                if self._eof or (end < len(self._buffer) and self._buffer[end] in DELIMITERS):
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            self._read()
+
+    def _parse(self):
+        try:
+            self._expect('{')
+            while True:
+                char = self._peek()
+                if char == '}':
+                    self._pos += 1
+                    return
+                if char == ',':
+                    self._pos += 1
+                    continue
+                key = self._value()
+                self._expect(':')
+                if key == self.array_key and self._peek() == '[':
+                    self._pos += 1
+                    while True:
+                        char = self._peek()
+                        if char == ']':
+                            self._pos += 1
+                            break
+                        if char == ',':
+                            self._pos += 1
+                            continue
+                        if char == '':
+                            raise ValueError('Invalid JSON: unterminated array {0!r}'.format(key))
+                        yield self._value()
+                else:
+                    self.fields[key] = self._value()
+        finally:
+            self._finish()
@@ -0,0 +1,132 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from connectors.core.connector import get_logger
+
+logger = get_logger('progress-whatsup-gold')
+
+# auth: token validation, queue: client-side throttle, connect: TCP/TLS setup, ttfb: wait for response headers
+# after the connection is ready, download: body transfer, decode: JSON decoding
+SPANS = ('auth', 'queue', 'connect', 'ttfb', 'download', 'decode')
+# bytes_received counts decoded response bodies, bytes_transferred the same bodies as sent over the wire
+COUNTERS = ('requests', 'errors', 'retries', 'cache_hits', 'cache_misses', 'token_refreshes', 'bytes_received',
+            'bytes_transferred', 'coalesced_requests')
+
+_connect_state = threading.local()
+_operation_summary = ContextVar('operation_summary', default=None)
+
+
+def record_connect(seconds):
+    _connect_state.seconds = getattr(_connect_state, 'seconds', 0.0) + seconds
+
+
+def pop_connect_time():
+    seconds = getattr(_connect_state, 'seconds', 0.0)
+    _connect_state.seconds = 0.0
+    return seconds
+
+
+class MetricsSummary:
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.spans = {span: 0.0 for span in SPANS}
+        self.span_counts = dict.fromkeys(SPANS, 0)
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, timings):
+        with self._lock:
+            for span, seconds in timings.items():
+                self.spans[span] += seconds
+                self.span_counts[span] += 1
+
+    def to_dict(self):
+        with self._lock:
+            summary = {name: value for name, value in self.counters.items() if value}
+            if self.counters['bytes_transferred']:
+                summary['compression_ratio'] = round(self.counters['bytes_received'] /
+                                                     self.counters['bytes_transferred'], 3)
+            coalesced = self.counters['coalesced_requests']
+            if coalesced:
+                # Share of calls answered by an identical GET already in flight instead of a request of their own
+                summary['coalescing_ratio'] = round(coalesced / (coalesced + self.counters['requests']), 3)
+            summary.update({span + '_ms': round(seconds * 1000, 3) for span, seconds in self.spans.items()
+                            if self.span_counts[span]})
+            return summary
+
+
+class MetricsRegistry(MetricsSummary):
+    """Process-wide counters and span totals, forwarded to registered hooks after every request."""
+
+    def __init__(self):
+        super().__init__()
+        self.hooks = []
+
+    def increment(self, name, value=1):
+        super().increment(name, value)
+        summary = _operation_summary.get()
+        if summary is not None:
+            summary.increment(name, value)
+
+    def observe_request(self, endpoint, status_code, timings):
+        self.observe(timings)
+        summary = _operation_summary.get()
+        if summary is not None:
+            summary.observe(timings)
+        if not self.hooks:
+            return
+        event = {'endpoint': endpoint, 'status_code': status_code,
+                 'timings': {span: round(seconds, 6) for span, seconds in timings.items()}}
+        for hook in list(self.hooks):
+            try:
+                hook(event)
+            except Exception as err:
+                logger.warning('Metrics hook {0} failed: {1}'.format(hook, err))
+
+    def render_prometheus(self, prefix='whatsup_gold_connector'):
+        lines = []
+        with self._lock:
+            for name, value in self.counters.items():
+                lines.append('# TYPE {0}_{1}_total counter'.format(prefix, name))
+                lines.append('{0}_{1}_total {2}'.format(prefix, name, value))
+            lines.append('# TYPE {0}_request_span_seconds summary'.format(prefix))
+            for span in SPANS:
+                lines.append('{0}_request_span_seconds_sum{{span="{1}"}} {2:.6f}'.format(prefix, span,
+                                                                                      self.spans[span]))
+                lines.append('{0}_request_span_seconds_count{{span="{1}"}} {2}'.format(prefix, span,
+                                                                                    self.span_counts[span]))
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+def register_metrics_hook(hook):
+    """Call hook(event) after every request; event holds endpoint, status_code and per-span timings."""
+    metrics.hooks.append(hook)
+
+
+def unregister_metrics_hook(hook):
+    if hook in metrics.hooks:
+        metrics.hooks.remove(hook)
+
+
+@contextmanager
+def collect_operation_metrics():
+    summary = MetricsSummary()
+    token = _operation_summary.set(summary)
+    try:
+        yield summary
+    finally:
+        _operation_summary.reset(token)
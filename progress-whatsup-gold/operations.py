@@ -6,13 +6,53 @@ Copyright end
 """
 
 
+import re
+import json
+import hashlib
 import requests
+import random
+import threading
+from time import sleep, time, perf_counter
+from functools import partial
+from contextlib import closing
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .constants import *
 from .whatsup_gold_api_auth import *
+from .session_pool import get_session, pool_options
+from .cache import (response_cache, validator_cache, account_scope, make_cache_key, validator_key, validator_entry,
+                    conditional_headers)
+from .compression import accept_encoding
+from .coalesce import in_flight_requests
+from .disk_cache import get_disk_cache, get_disk_cache_stats
+from .json_stream import JSONArrayStream
+from .utils import get_config_number, remaining_time, parse_retry_after
+from .throttle import get_governor
+from .metrics import metrics, pop_connect_time
+from .throttle import get_governor_stats
+from .inventory import get_inventory
+from .resolver import get_device_index
+from .report_windows import parse_utc, format_utc, split_range, merge_records
+from .cursors import get_cursor_store
+from .aggregation import ReportAggregator
+from .columnar import COLUMNAR_FORMAT, columnar_result
+from .async_client import async_available, run_requests
 from connectors.core.connector import get_logger, ConnectorError
 
 logger = get_logger('progress-whatsup-gold')
 
+DEVICE_ID_PATTERN = re.compile(r'^-?\d+$')
+
+# Configuration keys that change client behaviour; token fields are deliberately excluded
+CLIENT_CONFIG_FIELDS = ('resource', 'username', 'password', 'verify_ssl', 'pool_size', 'pool_idle_timeout',
+                        'cache_max_size', 'token_refresh_skew', 'connect_timeout', 'read_timeout', 'max_retries',
+                        'backoff_factor', 'rate_limit', 'rate_limit_burst', 'max_concurrent_requests', 'disk_cache',
+                        'disk_cache_path', 'disk_cache_max_size', 'conditional_requests', 'compress_responses',
+                        'coalesce_requests')
+
+_clients = {}
+_clients_lock = threading.Lock()
+
 
 class ProgressWhatsUpGold(object):
     def __init__(self, config):
@@ -20,28 +60,197 @@ class ProgressWhatsUpGold(object):
         if not self.server_url.startswith('https://') and not self.server_url.startswith('http://'):
             self.server_url = 'https://' + self.server_url
         self.verify_ssl = config.get('verify_ssl')
+        self.client_key = client_key(config)
+        # Cached and shared responses are keyed by account, as WhatsUp Gold filters results by user permissions
+        self.cache_scope = account_scope(self.server_url, config.get('username'))
+        self.pool_options = pool_options(config)
+        response_cache.resize(get_config_number(config, 'cache_max_size', DEFAULT_CACHE_MAX_SIZE))
+        validator_cache.resize(get_config_number(config, 'cache_max_size', DEFAULT_CACHE_MAX_SIZE))
+        self.conditional_requests = config.get('conditional_requests', True) is not False
+        self.accept_encoding = accept_encoding(config)
+        self.coalesce_requests = config.get('coalesce_requests', True) is not False
+        self.disk_cache = get_disk_cache(config, self.cache_scope)
+        self.connect_timeout = get_config_number(config, 'connect_timeout', DEFAULT_CONNECT_TIMEOUT, float)
+        self.read_timeout = get_config_number(config, 'read_timeout', DEFAULT_READ_TIMEOUT, float)
+        self.max_retries = get_config_number(config, 'max_retries', DEFAULT_MAX_RETRIES)
+        self.backoff_factor = get_config_number(config, 'backoff_factor', DEFAULT_BACKOFF_FACTOR, float)
+        self.governor = get_governor(self.server_url, config)
         self.wg_auth = WhatsUpGoldAuth(config)
         self.connector_info = config.pop('connector_info', '')
 
-    def make_rest_call(self, config, endpoint=None, params=None, json_body=None, payload=None, method='GET'):
+    @property
+    def session(self):
+        return get_session(self.server_url, self.verify_ssl, self.pool_options)
+
+    def make_rest_call(self, config, endpoint=None, params=None, json_body=None, payload=None, method='GET',
+                       cache_ttl=None, bypass_cache=False):
+        cache_key = make_cache_key(self.cache_scope, endpoint, params) if method == 'GET' else None
+        if cache_key and cache_ttl and not bypass_cache:
+            cached = self.cached_response(cache_key, endpoint)
+            if cached is not None:
+                return cached
+        call = partial(self._make_rest_call, config, endpoint, params, json_body, payload, method,
+                       conditional_key=cache_key if self.conditional_requests else None)
+        if cache_key and self.coalesce_requests:
+            resp = in_flight_requests.run(cache_key, call)
+        else:
+            resp = call()
+        if cache_key and cache_ttl:
+            self.store_response(cache_key, resp, cache_ttl)
+        return resp
+
+    def cached_response(self, cache_key, endpoint):
+        """Look a response up in the in-memory cache, then in the disk cache shared with other workers."""
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.debug('Cache hit for {0}'.format(endpoint))
+            metrics.increment('cache_hits')
+            return cached
+        metrics.increment('cache_misses')
+        entry = self.disk_cache.lookup(cache_key) if self.disk_cache is not None else None
+        if entry is None:
+            return None
+        logger.debug('Disk cache hit for {0}'.format(endpoint))
+        metrics.increment('disk_cache_hits')
+        cached, ttl = entry
+        response_cache.set(cache_key, cached, ttl)
+        return cached
+
+    def store_response(self, cache_key, resp, cache_ttl):
+        if not isinstance(resp, dict) or resp == {"message": "Not Found"}:
+            return
+        response_cache.set(cache_key, resp, cache_ttl)
+        if self.disk_cache is not None:
+            self.disk_cache.set(cache_key, resp, cache_ttl)
+
+    def stored_validators(self, cache_key):
+        """Return the last response for cache_key with its ETag and Last-Modified, from memory or the disk cache."""
+        entry = validator_cache.get(cache_key)
+        if entry is None and self.disk_cache is not None:
+            entry = self.disk_cache.get(validator_key(cache_key))
+            if entry is not None:
+                validator_cache.set(cache_key, entry, VALIDATOR_CACHE_TTL)
+        return entry
+
+    def store_validators(self, cache_key, response_headers, resp):
+        entry = validator_entry(response_headers, resp)
+        if entry is None:
+            return
+        validator_cache.set(cache_key, entry, VALIDATOR_CACHE_TTL)
+        if self.disk_cache is not None:
+            self.disk_cache.set(validator_key(cache_key), entry, VALIDATOR_CACHE_TTL)
+
+    def _request_timeout(self):
+        remaining = remaining_time()
+        if remaining is None:
+            return self.connect_timeout, self.read_timeout
+        if remaining <= 0:
+            raise ConnectorError('The operation deadline was exceeded')
+        return min(self.connect_timeout, remaining), min(self.read_timeout, remaining)
+
+    def _backoff(self, attempt, retry_after, reason):
+        sleep(self.backoff_delay(attempt, retry_after, reason))
+
+    def backoff_delay(self, attempt, retry_after, reason):
+        metrics.increment('retries')
+        delay = random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff_factor * (2 ** attempt)))
+        if retry_after is not None:
+            if retry_after > MAX_BACKOFF_SECONDS:
+                raise ConnectorError('Server asked to retry after {0:.0f}s: {1}'.format(retry_after, reason))
+            delay = retry_after
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            raise ConnectorError('The operation deadline was exceeded while retrying after: {0}'.format(reason))
+        logger.warning('Retrying request in {0:.2f}s (attempt {1}) after: {2}'.format(delay, attempt + 1, reason))
+        return delay
+
+    def stream_rest_call(self, config, endpoint=None, params=None):
+        """Return a JSONArrayStream over the response data array, or the plain response when it is not JSON."""
+        return self._make_rest_call(config, endpoint, params, stream=True)
+
+    def _make_rest_call(self, config, endpoint=None, params=None, json_body=None, payload=None, method='GET',
+                        stream=False, conditional_key=None):
+        timings = {}
+        started = perf_counter()
         token = self.wg_auth.validate_token(config, self.connector_info)
-        headers = {'Authorization': token, 'Accept': 'application/json'}
+        timings['auth'] = perf_counter() - started
+        headers = {'Authorization': token, 'Accept': 'application/json', 'Accept-Encoding': self.accept_encoding}
+        validators = self.stored_validators(conditional_key) if conditional_key else None
+        if validators:
+            headers.update(conditional_headers(validators))
         service_url = f'{self.server_url}/api/v1/{endpoint}'
         logger.debug('Request URL {0}'.format(service_url))
+        retries = self.max_retries if method == 'GET' else 0
+        attempt = 0
+        release_slot = None
+        metrics.increment('requests')
         try:
-            response = requests.request(method, service_url, data=payload, headers=headers, json=json_body,
-                                        params=params, verify=self.verify_ssl)
+            while True:
+                pop_connect_time()
+                try:
+                    with self.governor.slot() as held:
+                        queue_wait = held.wait
+                        if queue_wait:
+                            logger.debug('Request queued for {0:.3f}s by the client-side throttle'.format(queue_wait))
+                        started = perf_counter()
+                        response = self.session.request(method, service_url, data=payload, headers=headers,
+                                                        json=json_body, params=params, verify=self.verify_ssl,
+                                                        stream=True, timeout=self._request_timeout())
+                        timings['connect'] = pop_connect_time()
+                        timings['ttfb'] = perf_counter() - started - timings['connect']
+                        if stream:
+                            # Streamed bodies keep the slot until they are read, so the in-flight cap covers them
+                            release_slot = held.detach()
+                        else:
+                            started = perf_counter()
+                            metrics.increment('bytes_received', len(response.content))
+                            metrics.increment('bytes_transferred', response.raw.tell())
+                            timings['download'] = perf_counter() - started
+                    timings['queue'] = timings.get('queue', 0.0) + queue_wait
+                except requests.exceptions.SSLError:
+                    raise
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as err:
+                    if attempt >= retries:
+                        raise
+                    self._backoff(attempt, None, err)
+                    attempt += 1
+                    continue
+                if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                    response.close()
+                    if release_slot:
+                        release_slot()
+                    self._backoff(attempt, retry_after, '{0}: {1}'.format(response.status_code, response.reason))
+                    attempt += 1
+                    continue
+                break
             if response.ok:
-                if response.status_code == 204:
-                    return response
-                content_type = response.headers.get('Content-Type')
-                if response.text != "" and 'application/json' in content_type:
-                    return response.json()
+                content_type = response.headers.get('Content-Type') or ''
+                if response.status_code == 304 and validators:
+                    logger.debug('Not modified, using the stored response for {0}'.format(endpoint))
+                    metrics.increment('not_modified')
+                    result = validators['body']
+                elif response.status_code == 204:
+                    result = response
+                elif stream and 'application/json' in content_type:
+                    result = JSONArrayStream(iter_content(response), 'data',
+                                             on_close=partial(close_stream, response, release_slot))
+                    release_slot = None
+                elif response.text != "" and 'application/json' in content_type:
+                    started = perf_counter()
+                    result = response.json()
+                    timings['decode'] = perf_counter() - started
+                    if conditional_key:
+                        self.store_validators(conditional_key, response.headers, result)
                 else:
-                    return response.content
-            elif response.status_code == 404:
+                    result = response.content
+                metrics.observe_request(endpoint, response.status_code, timings)
+                return result
+            metrics.observe_request(endpoint, response.status_code, timings)
+            if response.status_code == 404:
                 return {"message": "Not Found"}
             else:
+                metrics.increment('errors')
                 if response.text != "":
                     err_resp = response.json()
                     if err_resp and 'error_description' in err_resp:
@@ -74,6 +283,57 @@ class ProgressWhatsUpGold(object):
         except Exception as e:
             logger.error('{0}'.format(e))
             raise ConnectorError('{0}'.format(e))
+        finally:
+            if release_slot:
+                release_slot()
+
+
+def close_stream(response, release_slot):
+    try:
+        response.close()
+    finally:
+        release_slot()
+
+
+def iter_content(response):
+    """Yield the decoded body in chunks; urllib3 decompresses incrementally and raw.tell() counts wire bytes."""
+    transferred = 0
+    try:
+        for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+            metrics.increment('bytes_received', len(chunk))
+            metrics.increment('bytes_transferred', response.raw.tell() - transferred)
+            transferred = response.raw.tell()
+            yield chunk
+    except requests.exceptions.RequestException as err:
+        logger.error('Error while reading the response: {0}'.format(err))
+        raise ConnectorError('Error while reading the response: {0}'.format(err))
+
+
+def config_fingerprint(config):
+    values = [config.get(field) for field in CLIENT_CONFIG_FIELDS]
+    return hashlib.sha256(json.dumps(values, default=str).encode()).hexdigest()
+
+
+def client_key(config):
+    return config.get('config_id') or config.get('resource')
+
+
+def get_client(config):
+    """Return the cached ProgressWhatsUpGold client for this configuration, rebuilding it when it changes."""
+    connector_info = config.pop('connector_info', '')
+    key = client_key(config)
+    fingerprint = config_fingerprint(config)
+    with _clients_lock:
+        cached = _clients.get(key)
+        if cached is None or cached[0] != fingerprint:
+            if cached is not None:
+                logger.info('Configuration {0} changed, rebuilding client'.format(key))
+            cached = (fingerprint, ProgressWhatsUpGold(config))
+            _clients[key] = cached
+    client = cached[1]
+    if connector_info:
+        client.connector_info = connector_info
+    return client
 
 
 def build_params(params):
@@ -84,70 +344,627 @@ def build_query_param(param_name, param_value):
     return f'&{param_name}='.join([item.strip(" ") for item in param_value.split(',')])
 
 
+def is_repeated_page(endpoint, next_page_id, seen_page_ids):
+    """True when the server points back at a page already fetched, which would otherwise page forever."""
+    if next_page_id in seen_page_ids:
+        logger.warning('{0} returned page {1} again, stopping pagination'.format(endpoint, next_page_id))
+        return True
+    seen_page_ids.add(next_page_id)
+    return False
+
+
+def iter_pages(wg, config, endpoint, params, max_pages=None, **cache_options):
+    params = dict(params)
+    page_count = 0
+    seen_page_ids = {params.get('pageId')}
+    while True:
+        resp = wg.make_rest_call(config, endpoint=endpoint, params=params, **cache_options)
+        yield resp
+        page_count += 1
+        next_page_id = resp.get('paging', {}).get('nextPageId') if isinstance(resp, dict) else None
+        if not next_page_id or (max_pages and page_count >= max_pages):
+            break
+        if is_repeated_page(endpoint, next_page_id, seen_page_ids):
+            break
+        params['pageId'] = next_page_id
+
+
+def iter_streamed_pages(wg, config, endpoint, params, max_pages=None):
+    """Yield one JSONArrayStream per page; each page must be consumed before the next one is requested."""
+    params = dict(params)
+    page_count = 0
+    seen_page_ids = {params.get('pageId')}
+    while True:
+        page = wg.stream_rest_call(config, endpoint=endpoint, params=params)
+        yield page
+        if not isinstance(page, JSONArrayStream):
+            break
+        page_count += 1
+        next_page_id = (page.fields.get('paging') or {}).get('nextPageId')
+        if not next_page_id or (max_pages and page_count >= max_pages):
+            break
+        if is_repeated_page(endpoint, next_page_id, seen_page_ids):
+            break
+        params['pageId'] = next_page_id
+
+
+def page_records(page):
+    """Yield the records of a streamed page, reporting a truncated or malformed body as a ConnectorError."""
+    try:
+        yield from page
+    except ValueError as err:
+        logger.error('Invalid JSON in the response: {0}'.format(err))
+        raise ConnectorError('Invalid JSON in the response: {0}'.format(err))
+
+
+def iter_records(wg, config, endpoint, params, max_pages=None):
+    """Yield the data records of every page as they are decoded, keeping peak memory independent of report size.
+
+    When the first response is not a JSON page, such as a Not Found message, the generator returns it.
+    """
+    for page_count, page in enumerate(iter_streamed_pages(wg, config, endpoint, params, max_pages)):
+        if not isinstance(page, JSONArrayStream):
+            return page if page_count == 0 else None
+        with closing(page):
+            yield from page_records(page)
+
+
+def stream_pages(wg, config, endpoint, params, fetch_all_pages=False, max_pages=None, max_items=None):
+    if not fetch_all_pages:
+        page = wg.stream_rest_call(config, endpoint=endpoint, params=params)
+        if not isinstance(page, JSONArrayStream):
+            return page
+        with closing(page):
+            data = list(page_records(page))
+        return dict(page.fields, data=data)
+    result = {'paging': {'pageId': params.get('pageId'), 'nextPageId': None, 'size': 0, 'pageCount': 0}, 'data': []}
+    for page in iter_streamed_pages(wg, config, endpoint, params, max_pages):
+        if not isinstance(page, JSONArrayStream):
+            return page if result['paging']['pageCount'] == 0 else result
+        with closing(page):
+            for record in page_records(page):
+                result['data'].append(record)
+                if max_items and len(result['data']) >= max_items:
+                    break
+        result['paging']['pageCount'] += 1
+        result['paging']['nextPageId'] = (page.fields.get('paging') or {}).get('nextPageId')
+        if max_items and len(result['data']) >= max_items:
+            break
+    result['paging']['size'] = len(result['data'])
+    return result
+
+
+def fetch_pages(wg, config, endpoint, params, stream=False, **cache_options):
+    fetch_all_pages = params.pop('fetch_all_pages', False)
+    max_pages = params.pop('max_pages', None)
+    max_items = params.pop('max_items', None)
+    if stream:
+        call = partial(stream_pages, wg, config, endpoint, params, fetch_all_pages, max_pages, max_items)
+        if not wg.coalesce_requests:
+            return call()
+        # Identical concurrent report fetches share one download; followers receive a copy of the decoded pages
+        key = make_cache_key(wg.cache_scope, endpoint, dict(params, fetch_all_pages=fetch_all_pages,
+                                                            max_pages=max_pages, max_items=max_items))
+        return in_flight_requests.run(('stream_pages',) + key, call)
+    if not fetch_all_pages:
+        return wg.make_rest_call(config, endpoint=endpoint, params=params, **cache_options)
+    result = {'paging': {'pageId': params.get('pageId'), 'nextPageId': None, 'size': 0, 'pageCount': 0}, 'data': []}
+    for resp in iter_pages(wg, config, endpoint, params, max_pages, **cache_options):
+        if not isinstance(resp, dict) or 'data' not in resp:
+            return resp if result['paging']['pageCount'] == 0 else result
+        result['paging']['pageCount'] += 1
+        result['paging']['nextPageId'] = resp.get('paging', {}).get('nextPageId')
+        result['data'].extend(resp.get('data') or [])
+        if max_items and len(result['data']) >= max_items:
+            del result['data'][max_items:]
+            break
+    result['paging']['size'] = len(result['data'])
+    return result
+
+
+def split_values(value):
+    """Return the distinct non-empty items of a list or comma-separated string, in order."""
+    items = value if isinstance(value, (list, tuple, set)) else str(value).split(',')
+    values = []
+    for item in items:
+        item = str(item).strip()
+        if item and item not in values:
+            values.append(item)
+    return values
+
+
+def parse_device_ids(device_id):
+    device_ids = split_values(device_id)
+    if not device_ids:
+        raise ConnectorError('Specify at least one device ID')
+    return device_ids
+
+
+def fan_out(config, tasks):
+    """Run each zero-argument task over a bounded thread pool; results and errors are keyed like tasks."""
+    max_workers = max(min(get_config_number(config, 'max_workers', DEFAULT_MAX_WORKERS), len(tasks)), 1)
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(copy_context().run, task): key for key, task in tasks.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as err:
+                logger.error('{0}: {1}'.format(key, err))
+                errors[key] = str(err)
+    return ({key: results[key] for key in tasks if key in results},
+            {key: errors[key] for key in tasks if key in errors})
+
+
+def run_for_devices(wg, config, params, fetch, request=None):
+    """Run fetch for every device in params; request(device_id, params) enables the asyncio path for batches."""
+    device_ids, errors = resolve_device_ids(wg, config, parse_device_ids(params.pop('device_id', '')))
+    if len(device_ids) == 1 and not errors:
+        return fetch(wg, config, device_ids[0], params)
+    if not device_ids:
+        raise ConnectorError('; '.join(errors.values()))
+    if request is not None:
+        request_specs = {device_id: request(device_id, dict(params)) for device_id in device_ids}
+        results, fetch_errors = fan_out_requests(wg, config, request_specs)
+    else:
+        tasks = {device_id: partial(fetch, wg, config, device_id, dict(params)) for device_id in device_ids}
+        results, fetch_errors = fan_out(config, tasks)
+    errors.update(fetch_errors)
+    # A device that does not exist is a per-device failure, not a result
+    for device_id in [device_id for device_id, result in results.items() if result == {"message": "Not Found"}]:
+        errors[device_id] = results.pop(device_id)['message']
+    return {'data': results, 'errors': errors}
+
+
+def device_request(facet, device_id, params, **options):
+    """Describe one device request as (endpoint, params, paged, options) for execute_request or the asyncio client."""
+    return device_endpoints[facet].format(device_id=device_id), params, facet in PAGED_DEVICE_FACETS, options
+
+
+def execute_request(wg, config, endpoint, params, paged, options):
+    if paged:
+        return fetch_pages(wg, config, endpoint, params, **options)
+    return wg.make_rest_call(config, endpoint=endpoint, **options)
+
+
+def fan_out_requests(wg, config, request_specs):
+    """Run request descriptions concurrently, on the asyncio client when it is available, else on fan_out."""
+    if not request_specs:
+        return {}, {}
+    if async_enabled(config):
+        return run_requests(wg, config, request_specs)
+    tasks = {key: partial(execute_request, wg, config, *request) for key, request in request_specs.items()}
+    return fan_out(config, tasks)
+
+
+def async_enabled(config):
+    return async_available() and config.get('async_io', True) is not False
+
+
+def _get_device_attributes(wg, config, device_id, params):
+    return execute_request(wg, config, *device_request('attributes', device_id, params))
+
+
+def _get_device_groups(wg, config, device_id, params, **cache_options):
+    return execute_request(wg, config, *device_request('groups', device_id, params, **cache_options))
+
+
+def _get_device_monitors(wg, config, device_id, params):
+    return execute_request(wg, config, *device_request('monitors', device_id, params))
+
+
+def _get_device_polling_configuration(wg, config, device_id, params, **cache_options):
+    return execute_request(wg, config, *device_request('polling_configuration', device_id, params, **cache_options))
+
+
+def _get_device_summary(wg, config, device_id, params, **cache_options):
+    return execute_request(wg, config, *device_request('summary', device_id, params, **cache_options))
+
+
+def _get_device_overview(wg, config, device_id, params, **cache_options):
+    return execute_request(wg, config, *device_request('overview', device_id, params, **cache_options))
+
+
+def report_request(device_id, report_type, params):
+    endpoint = f"devices/{device_id}/reports/{endpoints.get(report_type)}"
+    return endpoint, params, True, {'stream': True}
+
+
+def _get_device_report(wg, config, device_id, params):
+    report_type = endpoints.get(params.pop('report_type'))
+    endpoint = f"devices/{device_id}/reports/{report_type}"
+    if params.pop('incremental', False):
+        return fetch_incremental_report(wg, config, device_id, report_type, endpoint, params)
+    windows = report_windows(config, params)
+    if windows:
+        return fetch_report_windows(wg, config, endpoint, params, windows)
+    return fetch_pages(wg, config, endpoint, params, stream=True)
+
+
+def report_windows(config, params):
+    """Return the windows to fetch a long custom range in, or None to send it as requested.
+
+    Windows replace the caller's paging, so they are only used when every page is wanted anyway.
+    """
+    window_seconds = get_config_number(config, 'report_window_minutes', DEFAULT_REPORT_WINDOW_MINUTES) * 60
+    if params.get('range') != 'custom' or window_seconds <= 0:
+        return None
+    if not params.get('fetch_all_pages') or params.get('pageId') or params.get('max_pages'):
+        return None
+    try:
+        start = int(parse_utc(params['rangeStartUtc']).timestamp())
+        end = int(parse_utc(params['rangeEndUtc']).timestamp())
+    except (KeyError, TypeError, ValueError):
+        return None
+    if end - start <= window_seconds:
+        return None
+    return split_range(start, end, window_seconds, time() - REPORT_WINDOW_SETTLE_SECONDS)
+
+
+def _fetch_report_window(wg, config, endpoint, params, window):
+    window_start, window_end, cacheable = window
+    params = dict(params, rangeStartUtc=format_utc(window_start), rangeEndUtc=format_utc(window_end))
+    cache_key = make_cache_key(wg.cache_scope, endpoint, params) if cacheable else None
+    if cache_key is not None:
+        cached = wg.cached_response(cache_key, endpoint)
+        if cached is not None:
+            return cached['data'], True
+    result = fetch_pages(wg, config, endpoint, dict(params, fetch_all_pages=True), stream=True)
+    if not isinstance(result, dict) or 'data' not in result:
+        message = result.get('message') if isinstance(result, dict) else result
+        raise ConnectorError('{0} to {1}: {2}'.format(params['rangeStartUtc'], params['rangeEndUtc'], message))
+    if cache_key is not None:
+        wg.store_response(cache_key, {'data': result['data']}, REPORT_WINDOW_CACHE_TTL)
+    return result['data'], False
+
+
+def fetch_report_windows(wg, config, endpoint, params, windows):
+    """Fetch a long custom range as parallel sub-windows and merge the records in time order."""
+    params.pop('fetch_all_pages', None)
+    params.pop('max_pages', None)
+    params.pop('pageId', None)
+    max_items = params.pop('max_items', None)
+    tasks = {window: partial(_fetch_report_window, wg, config, endpoint, params, window) for window in windows}
+    results, errors = fan_out(config, tasks)
+    if errors:
+        raise ConnectorError('Unable to retrieve report windows: {0}'.format('; '.join(errors.values())))
+    data = merge_records(results[window][0] for window in windows)
+    if max_items:
+        del data[max_items:]
+    return {
+        'paging': {'pageId': None, 'nextPageId': None, 'size': len(data), 'windowCount': len(windows),
+                   'cachedWindows': sum(1 for window in windows if results[window][1])},
+        'data': data
+    }
+
+
+def fetch_incremental_report(wg, config, device_id, report_type, endpoint, params):
+    """Return only the report records added since the previous incremental call for this device and report type."""
+    store = get_cursor_store(wg.server_url, config.get('cursor_path'))
+    if params.pop('reset_cursor', False):
+        store.reset(device_id, report_type)
+    cursor = store.get(device_id, report_type)
+    if cursor:
+        params.pop('rangeN', None)
+        params.update(range='custom', rangeStartUtc=format_utc(int(cursor['last_seen'])),
+                      rangeEndUtc=format_utc(time()))
+    for option in ('pageId', 'max_pages', 'max_items'):
+        params.pop(option, None)
+    params['fetch_all_pages'] = True
+    windows = report_windows(config, params)
+    if windows:
+        result = fetch_report_windows(wg, config, endpoint, params, windows)
+    else:
+        result = fetch_pages(wg, config, endpoint, params, stream=True)
+    if not isinstance(result, dict) or 'data' not in result:
+        return result
+    data, cursor = store.advance(device_id, report_type, result['data'])
+    return {
+        'paging': {'pageId': None, 'nextPageId': None, 'size': len(data)},
+        'data': data,
+        'cursor': cursor.get('last_seen_utc') if cursor else None
+    }
+
+
+def format_output(result, output_format):
+    if output_formats.get(output_format, output_format) == COLUMNAR_FORMAT:
+        return columnar_result(result)
+    return result
+
+
+def cache_options(operation, params):
+    return {'cache_ttl': CACHE_TTL.get(operation), 'bypass_cache': bool(params.pop('bypass_cache', False))}
+
+
 def get_device_attributes(config, params):
-    wg = ProgressWhatsUpGold(config)
+    wg = get_client(config)
     params = build_params(params)
-    device_id = params.pop('device_id')
+    output_format = params.pop('output_format', None)
     if params.get('names') and ',' in params.get('names'):
         params['names'] = build_query_param('names', params.get('names'))
-    endpoint = f'devices/{device_id}/attributes/-'
-    resp = wg.make_rest_call(config, endpoint=endpoint, params=params)
-    return resp
+    result = run_for_devices(wg, config, params, _get_device_attributes, partial(device_request, 'attributes'))
+    return format_output(result, output_format)
 
 
 def get_device_groups(config, params):
-    wg = ProgressWhatsUpGold(config)
+    wg = get_client(config)
     params = build_params(params)
-    device_id = params.pop('device_id')
+    output_format = params.pop('output_format', None)
     if params.get('view'):
         params['view'] = params.get('view').lower()
-    endpoint = f'devices/{device_id}/group/-'
-    resp = wg.make_rest_call(config, endpoint=endpoint, params=params)
-    return resp
+    options = cache_options('get_device_groups', params)
+    result = run_for_devices(wg, config, params, partial(_get_device_groups, **options),
+                             partial(device_request, 'groups', **options))
+    return format_output(result, output_format)
 
 
 def get_device_monitors(config, params):
-    wg = ProgressWhatsUpGold(config)
+    wg = get_client(config)
     params = build_params(params)
-    device_id = params.pop('device_id')
-    endpoint = f'devices/{device_id}/monitors/-'
-    resp = wg.make_rest_call(config, endpoint=endpoint, params=params)
-    return resp
+    output_format = params.pop('output_format', None)
+    result = run_for_devices(wg, config, params, _get_device_monitors, partial(device_request, 'monitors'))
+    return format_output(result, output_format)
 
 
 def get_device_polling_configuration(config, params):
-    wg = ProgressWhatsUpGold(config)
-    device_id = params.pop('device_id')
-    endpoint = f'devices/{device_id}/config/polling'
-    resp = wg.make_rest_call(config, endpoint=endpoint)
-    return resp
+    wg = get_client(config)
+    options = cache_options('get_device_polling_configuration', params)
+    return run_for_devices(wg, config, params, partial(_get_device_polling_configuration, **options),
+                           partial(device_request, 'polling_configuration', **options))
 
 
 def get_device_summary(config, params):
-    wg = ProgressWhatsUpGold(config)
-    device_id = params.pop('device_id')
-    endpoint = f'devices/{device_id}/config/template'
-    resp = wg.make_rest_call(config, endpoint=endpoint)
-    return resp
+    wg = get_client(config)
+    options = cache_options('get_device_summary', params)
+    return run_for_devices(wg, config, params, partial(_get_device_summary, **options),
+                           partial(device_request, 'summary', **options))
 
 
 def get_device_overview(config, params):
-    wg = ProgressWhatsUpGold(config)
-    device_id = params.pop('device_id')
-    endpoint = f'devices/{device_id}'
-    resp = wg.make_rest_call(config, endpoint=endpoint)
-    return resp
+    wg = get_client(config)
+    options = cache_options('get_device_overview', params)
+    return run_for_devices(wg, config, params, partial(_get_device_overview, **options),
+                           partial(device_request, 'overview', **options))
 
 
 def get_device_report(config, params):
-    wg = ProgressWhatsUpGold(config)
+    wg = get_client(config)
     params = build_params(params)
+    output_format = params.pop('output_format', None)
     if params.get('range'):
         params['range'] = report_duration.get(params.get('range'))
-    device_id = params.pop('device_id')
+    aggregator = report_aggregator(params)
+    if aggregator is None:
+        return format_output(run_for_devices(wg, config, params, _get_device_report), output_format)
+    result = run_for_devices(wg, config, params, partial(_aggregate_device_report, aggregator))
+    if 'errors' not in result and 'size' not in result:
+        return result
+    summary = aggregator.result()
+    summary['errors'] = {device_id: device_result.get('message', device_result)
+                         for device_id, device_result in (result.get('data') or {}).items()
+                         if 'size' not in device_result}
+    summary['errors'].update(result.get('errors') or {})
+    return format_output(summary, output_format)
+
+
+def report_aggregator(params):
+    if not params.pop('aggregate', False):
+        return None
+    statistics = [aggregation_statistics.get(statistic, statistic) for statistic in params.pop('statistics', None)
+                  or ['Average']]
+    bucket = params.pop('bucket', None)
+    metric_field = (params.pop('metric_field', None) or
+                    REPORT_METRIC_FIELDS.get(endpoints.get(params.get('report_type'))))
+    if not metric_field:
+        raise ConnectorError('Specify the metric field to aggregate for the {0}'.format(params.get('report_type')))
+    try:
+        return ReportAggregator(metric_field, statistics, aggregation_buckets.get(bucket, bucket),
+                                params.pop('top_n', None))
+    except ValueError as err:
+        raise ConnectorError(str(err))
+
+
+def _aggregate_device_report(aggregator, wg, config, device_id, params):
+    if params.get('incremental') or report_windows(config, params):
+        # Cursors and window merging need the whole record list
+        result = _get_device_report(wg, config, device_id, params)
+        if not isinstance(result, dict) or 'data' not in result:
+            return result
+        aggregator.add(result['data'])
+        return {'size': len(result['data'])}
     endpoint = f"devices/{device_id}/reports/{endpoints.get(params.pop('report_type'))}"
-    resp = wg.make_rest_call(config, endpoint=endpoint, params=params)
-    return resp
+    max_pages = params.pop('max_pages', None) if params.pop('fetch_all_pages', False) else 1
+    max_items = params.pop('max_items', None)
+    records = iter_records(wg, config, endpoint, params, max_pages)
+    batch, size = [], 0
+    with closing(records):
+        while not max_items or size < max_items:
+            try:
+                batch.append(next(records))
+            except StopIteration as stop:
+                if stop.value is not None:
+                    return stop.value
+                break
+            size += 1
+            if len(batch) >= AGGREGATION_BATCH_SIZE:
+                aggregator.add(batch)
+                batch = []
+    aggregator.add(batch)
+    return {'size': size}
+
+
+def parse_report_types(report_types):
+    items = report_types if isinstance(report_types, (list, tuple, set)) else str(report_types or '').split(',')
+    report_types = []
+    for item in items:
+        item = str(item).strip()
+        if item and item not in report_types:
+            report_types.append(item)
+    if not report_types:
+        raise ConnectorError('Specify at least one report type')
+    unknown = [report_type for report_type in report_types if report_type not in endpoints]
+    if unknown:
+        raise ConnectorError('Unknown report types: {0}'.format(', '.join(unknown)))
+    return report_types
+
+
+def get_device_reports(config, params):
+    wg = get_client(config)
+    params = build_params(params)
+    output_format = params.pop('output_format', None)
+    report_types = parse_report_types(params.pop('report_types', None))
+    if params.get('range'):
+        params['range'] = report_duration.get(params.get('range'))
+    device_ids, resolve_errors = resolve_device_ids(wg, config, parse_device_ids(params.pop('device_id', '')))
+    if params.get('incremental') or report_windows(config, params):
+        tasks = {(device_id, report_type): partial(_get_device_report, wg, config, device_id,
+                                                   dict(params, report_type=report_type))
+                 for device_id in device_ids for report_type in report_types}
+        results, fetch_errors = fan_out(config, tasks) if tasks else ({}, {})
+    else:
+        request_specs = {(device_id, report_type): report_request(device_id, report_type, dict(params))
+                         for device_id in device_ids for report_type in report_types}
+        results, fetch_errors = fan_out_requests(wg, config, request_specs)
+    rows = []
+    errors = [{'device_id': device_id, 'report_type': None, 'message': message}
+              for device_id, message in resolve_errors.items()]
+    for (device_id, report_type), result in results.items():
+        if isinstance(result, dict) and 'data' in result:
+            rows.append({'device_id': device_id, 'report_type': report_type,
+                         'paging': result.get('paging'), 'data': result.get('data')})
+        else:
+            fetch_errors[(device_id, report_type)] = result.get('message') if isinstance(result, dict) else result
+    errors.extend({'device_id': device_id, 'report_type': report_type, 'message': message}
+                  for (device_id, report_type), message in fetch_errors.items())
+    return format_output({'data': rows, 'errors': errors}, output_format)
+
+
+def facet_cache_options(facet, bypass_cache=False):
+    cache_ttl = CACHE_TTL.get('get_device_' + facet)
+    return {'cache_ttl': cache_ttl, 'bypass_cache': bypass_cache} if cache_ttl else {}
+
+
+def _get_device_360(wg, config, device_id, params):
+    facets = [device_facets.get(facet, facet) for facet in params.get('facets') or device_facets]
+    unknown = [facet for facet in facets if facet not in device_endpoints]
+    if unknown:
+        raise ConnectorError('Unknown device facets: {0}'.format(', '.join(unknown)))
+    request_specs = {}
+    for facet in facets:
+        facet_params = {'fetch_all_pages': True} if facet in PAGED_DEVICE_FACETS else {}
+        request_specs[facet] = device_request(facet, device_id, facet_params,
+                                              **facet_cache_options(facet, params.get('bypass_cache', False)))
+    results, errors = fan_out_requests(wg, config, request_specs)
+    if not results:
+        raise ConnectorError('Unable to retrieve device {0}: {1}'.format(device_id, errors))
+    result = {facet: results.get(facet) for facet in facets}
+    result['errors'] = errors
+    return result
+
+
+def get_device_360(config, params):
+    wg = get_client(config)
+    params = build_params(params)
+    if isinstance(params.get('facets'), str):
+        params['facets'] = [facet.strip() for facet in params['facets'].split(',') if facet.strip()]
+    return run_for_devices(wg, config, params, _get_device_360)
+
+
+def list_devices(wg, config, group_id=DEFAULT_ROOT_GROUP_ID):
+    endpoint = f'device-groups/{group_id}/devices/-'
+    listing = fetch_pages(wg, config, endpoint, {'view': 'overview', 'isRecursive': 'true',
+                                                 'limit': DEVICE_LIST_PAGE_SIZE, 'fetch_all_pages': True})
+    if not isinstance(listing, dict) or 'data' not in listing:
+        raise ConnectorError('Unable to list the devices of group {0}: {1}'.format(group_id, listing))
+    return listing['data']
+
+
+def device_index(wg, config):
+    ttl = get_config_number(config, 'resolver_ttl', DEFAULT_RESOLVER_TTL)
+    return get_device_index(wg.cache_scope, partial(list_devices, wg, config), ttl)
+
+
+def resolve_device_ids(wg, config, device_ids):
+    """Replace hostnames, IP addresses and CIDR subnets with the matching device IDs."""
+    resolved, errors = [], {}
+    for device_id in device_ids:
+        if DEVICE_ID_PATTERN.match(device_id):
+            matches = [device_id]
+        else:
+            matches = device_index(wg, config).resolve(device_id)
+            if not matches:
+                errors[device_id] = 'No device found matching {0}'.format(device_id)
+        resolved.extend(match for match in matches if match not in resolved)
+    return resolved, errors
+
+
+def resolve_device(config, params):
+    wg = get_client(config)
+    queries = split_values(params.get('query', ''))
+    if not queries:
+        raise ConnectorError('Specify at least one hostname, device name, IP address or subnet to resolve')
+    index = device_index(wg, config)
+    result = {}
+    for query in queries:
+        result[query] = [{field: index.devices[device_id].get(field) for field in RESOLVER_OUTPUT_FIELDS}
+                         for device_id in index.resolve(query)]
+    return {'data': result}
+
+
+def _fetch_inventory_details(wg, config, device_ids):
+    request_specs = {}
+    for device_id in device_ids:
+        request_specs[(device_id, 'groups')] = device_request('groups', device_id, {'fetch_all_pages': True})
+        request_specs[(device_id, 'polling')] = device_request('polling_configuration', device_id, {})
+    results, request_errors = fan_out_requests(wg, config, request_specs)
+    details, errors = {}, {}
+    for (device_id, facet), message in request_errors.items():
+        errors.setdefault(device_id, '{0}: {1}'.format(facet, message))
+    for (device_id, facet), result in results.items():
+        # Not Found messages and non-JSON bodies are failures for that device, not details
+        if not isinstance(result, dict) or 'data' not in result:
+            message = result.get('message', result) if isinstance(result, dict) else result
+            errors.setdefault(device_id, '{0}: {1}'.format(facet, message))
+    for device_id in device_ids:
+        if device_id not in errors:
+            details[device_id] = {'groups': results[(device_id, 'groups')]['data'] or [],
+                                  'polling': results[(device_id, 'polling')]['data']}
+    return details, errors
+
+
+def build_device_inventory(config, params):
+    wg = get_client(config)
+    params = build_params(params)
+    devices = list_devices(wg, config, params.get('group_id', DEFAULT_ROOT_GROUP_ID))
+    inventory = get_inventory(wg.server_url, config.get('inventory_path'))
+    max_age = get_config_number(config, 'inventory_details_max_age', DEFAULT_INVENTORY_DETAILS_MAX_AGE)
+    return inventory.refresh(devices, partial(_fetch_inventory_details, wg, config),
+                             full_refresh=bool(params.get('full_refresh')), max_age=max_age)
+
+
+def lookup_device_inventory(config, params):
+    wg = get_client(config)
+    inventory = get_inventory(wg.server_url, config.get('inventory_path'))
+    if not inventory.load():
+        raise ConnectorError('No device inventory snapshot found, run Build Device Inventory first')
+    device_ids = parse_device_ids(params.get('device_id', ''))
+    records = {device_id: inventory.get(device_id) for device_id in device_ids}
+    return {
+        'data': {device_id: record for device_id, record in records.items() if record is not None},
+        'missing': [device_id for device_id, record in records.items() if record is None],
+        'built_at': inventory.built_at
+    }
+
+
+def get_connector_metrics(config, params):
+    return {
+        'metrics': metrics.to_dict(),
+        'cache': response_cache.stats(),
+        'disk_cache': get_disk_cache_stats(),
+        'throttle': get_governor_stats(),
+        'prometheus': metrics.render_prometheus()
+    }
 
 
 def check_health_ex(config, connector_info):
@@ -165,5 +982,11 @@ operations = {
     'get_device_summary': get_device_summary,
     'get_device_overview': get_device_overview,
     'get_device_report': get_device_report,
+    'get_device_reports': get_device_reports,
+    'get_device_360': get_device_360,
+    'get_connector_metrics': get_connector_metrics,
+    'build_device_inventory': build_device_inventory,
+    'lookup_device_inventory': lookup_device_inventory,
+    'resolve_device': resolve_device,
     'check_health': check_health_ex
 }
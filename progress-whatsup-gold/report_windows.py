@@ -0,0 +1,60 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import json
+from datetime import datetime, timezone
+from .constants import REPORT_TIME_FIELDS
+
+
+def parse_utc(value):
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def format_utc(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def split_range(start, end, window_seconds, settled_before):
+    """Split [start, end) epoch seconds into windows aligned to multiples of window_seconds.
+
+    Returns (start, end, cacheable) tuples; only complete grid windows that ended before settled_before are
+    cacheable, so a later overlapping query reuses them and fetches just the partial windows at its edges.
+    """
+    windows = []
+    window_start = start
+    while window_start < end:
+        window_end = min((window_start // window_seconds + 1) * window_seconds, end)
+        complete = window_start % window_seconds == 0 and window_end - window_start == window_seconds
+        windows.append((window_start, window_end, complete and window_end <= settled_before))
+        window_start = window_end
+    return windows
+
+
+def record_time(record):
+    for field in REPORT_TIME_FIELDS:
+        if record.get(field):
+            return str(record[field])
+    return ''
+
+
+def merge_records(record_lists):
+    """Concatenate per-window records in time order, dropping records repeated at window boundaries."""
+    seen = set()
+    merged = []
+    for records in record_lists:
+        for record in records:
+            key = json.dumps(record, sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                merged.append(record)
+    merged.sort(key=record_time)
+    return merged
@@ -0,0 +1,111 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import threading
+import ipaddress
+from bisect import bisect_left, bisect_right
+from time import monotonic
+from .utils import remaining_time
+from connectors.core.connector import ConnectorError
+
+_indexes = {}
+_index_builds = {}
+_indexes_lock = threading.Lock()
+
+
+def _parse_ip(value):
+    try:
+        return ipaddress.ip_address(str(value).strip())
+    except ValueError:
+        return None
+
+
+class DeviceIndex:
+    """Exact host/name/IP lookups through a hash map, subnet queries through sorted per-family address arrays."""
+
+    def __init__(self, devices):
+        self.devices = {}
+        self.exact = {}
+        addresses = {4: [], 6: []}
+        for device in devices:
+            device_id = str(device.get('id'))
+            self.devices[device_id] = device
+            for key in self._keys(device):
+                ids = self.exact.setdefault(key, [])
+                if device_id not in ids:
+                    ids.append(device_id)
+            address = _parse_ip(device.get('networkAddress') or '')
+            if address is not None:
+                addresses[address.version].append((int(address), device_id))
+        self.addresses = {version: sorted(entries) for version, entries in addresses.items()}
+        self.address_keys = {version: [entry[0] for entry in entries] for version, entries in self.addresses.items()}
+
+    @staticmethod
+    def _keys(device):
+        for field in ('hostName', 'name', 'networkAddress'):
+            value = str(device.get(field) or '').strip().lower()
+            if not value:
+                continue
+            yield value
+            address = _parse_ip(value)
+            if address is not None:
+                yield str(address)
+            elif '.' in value:
+                yield value.split('.', 1)[0]
+
+    def resolve(self, query):
+        """Return the IDs of the devices matching a hostname, device name, IP address or CIDR subnet."""
+        query = str(query).strip().lower()
+        if '/' in query:
+            try:
+                network = ipaddress.ip_network(query, strict=False)
+            except ValueError:
+                return []
+            keys = self.address_keys[network.version]
+            start = bisect_left(keys, int(network.network_address))
+            end = bisect_right(keys, int(network.broadcast_address))
+            return [device_id for _, device_id in self.addresses[network.version][start:end]]
+        address = _parse_ip(query)
+        return list(self.exact.get(str(address) if address is not None else query, []))
+
+
+class CachedIndex:
+
+    def __init__(self, index, ttl):
+        self.index = index
+        self.expires_at = monotonic() + ttl
+
+
+def get_device_index(scope, load_devices, ttl):
+    """Return the device index for an account_scope(), rebuilding it with load_devices() once it is older than ttl.
+
+    One caller per scope rebuilds at a time. While it does, the others keep using the expired index, or wait for
+    the new one when there is none yet, so an alert storm does not list every device once per request.
+    """
+    with _indexes_lock:
+        cached = _indexes.get(scope)
+        if cached is not None and cached.expires_at > monotonic():
+            return cached.index
+        build_lock = _index_builds.setdefault(scope, threading.Lock())
+    if cached is not None:
+        if not build_lock.acquire(blocking=False):
+            return cached.index
+    else:
+        remaining = remaining_time()
+        if not build_lock.acquire(timeout=max(remaining, 0) if remaining is not None else -1):
+            raise ConnectorError('The operation deadline was exceeded while waiting for the device index')
+    try:
+        with _indexes_lock:
+            cached = _indexes.get(scope)
+        if cached is not None and cached.expires_at > monotonic():
+            return cached.index
+        index = DeviceIndex(load_devices())
+        with _indexes_lock:
+            _indexes[scope] = CachedIndex(index, ttl)
+        return index
+    finally:
+        build_lock.release()
@@ -0,0 +1,119 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import atexit
+import threading
+from time import monotonic, perf_counter
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from .constants import DEFAULT_POOL_SIZE, DEFAULT_POOL_IDLE_TIMEOUT
+from .utils import get_config_number
+from .metrics import record_connect
+from connectors.core.connector import get_logger
+
+logger = get_logger('progress-whatsup-gold')
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+class TimedHTTPConnection(HTTPConnection):
+
+    def connect(self):
+        started = perf_counter()
+        try:
+            super().connect()
+        finally:
+            record_connect(perf_counter() - started)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+
+    def connect(self):
+        started = perf_counter()
+        try:
+            super().connect()
+        finally:
+            record_connect(perf_counter() - started)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections report TCP/TLS setup time to the metrics module."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
+
+
+class PooledSession:
+
+    def __init__(self, pool_size, idle_timeout):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.last_used = monotonic()
+        self.session = Session()
+        self.session.headers.update({'Connection': 'keep-alive'})
+        adapter = TimedHTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def is_idle(self, ts_now):
+        return self.idle_timeout and ts_now - self.last_used > self.idle_timeout
+
+    def close(self):
+        self.session.close()
+
+
+def _evict_idle_sessions(ts_now):
+    for key in [key for key, pooled in _sessions.items() if pooled.is_idle(ts_now)]:
+        logger.debug('Closing idle connection pool for {0}'.format(key[0]))
+        _sessions.pop(key).close()
+
+
+def pool_options(config):
+    return {'pool_size': config.get('pool_size'), 'pool_idle_timeout': config.get('pool_idle_timeout')}
+
+
+def get_session(server_url, verify_ssl, config=None):
+    """Return the process-wide keep-alive session for the given server URL, verify_ssl and pool size.
+
+    The pool size is part of the key, so configurations that differ only in pool size each keep their own
+    session instead of closing one another's while it is in use.
+    """
+    config = config or {}
+    pool_size = get_config_number(config, 'pool_size', DEFAULT_POOL_SIZE)
+    idle_timeout = get_config_number(config, 'pool_idle_timeout', DEFAULT_POOL_IDLE_TIMEOUT)
+    key = (server_url, bool(verify_ssl), pool_size)
+    ts_now = monotonic()
+    with _sessions_lock:
+        _evict_idle_sessions(ts_now)
+        pooled = _sessions.get(key)
+        if pooled is None:
+            pooled = PooledSession(pool_size, idle_timeout)
+            _sessions[key] = pooled
+        pooled.idle_timeout = idle_timeout
+        pooled.last_used = ts_now
+        return pooled.session
+
+
+@atexit.register
+def close_all_sessions():
+    with _sessions_lock:
+        for pooled in _sessions.values():
+            pooled.close()
+        _sessions.clear()
@@ -0,0 +1,102 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import tempfile
+import threading
+from .utils import private_temp_dir
+from connectors.core.connector import get_logger, ConnectorError
+
+logger = get_logger('progress-whatsup-gold')
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+def default_snapshot_path(prefix, server_url, extension):
+    """Path of a snapshot in the per-user private_temp_dir(), where other local users cannot plant or lock it."""
+    digest = hashlib.sha1(server_url.encode()).hexdigest()[:12]
+    try:
+        directory = private_temp_dir()
+    except OSError as err:
+        logger.error('{0}'.format(err))
+        raise ConnectorError('{0}'.format(err))
+    return os.path.join(directory, '{0}-{1}{2}'.format(prefix, digest, extension))
+
+
+class JSONSnapshot:
+    """State for one server persisted as a single JSON document, optionally gzip-compressed.
+
+    load() re-reads the file only when its mtime changed, so several worker processes see each other's saves;
+    save() writes a temporary file and renames it over the snapshot, so readers never see a partial document.
+    Subclasses implement to_snapshot() and from_snapshot().
+    """
+
+    description = 'snapshot'
+    compressed = False
+
+    def __init__(self, server_url, path):
+        self.server_url = server_url
+        self.path = path
+        self.loaded_mtime = None
+        self.lock = threading.RLock()
+
+    def to_snapshot(self):
+        raise NotImplementedError
+
+    def from_snapshot(self, snapshot):
+        raise NotImplementedError
+
+    def load(self):
+        with self.lock:
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return False
+            if mtime == self.loaded_mtime:
+                return True
+            opener = gzip.open if self.compressed else open
+            with opener(self.path, 'rt', encoding='utf-8') as snapshot_file:
+                snapshot = json.load(snapshot_file)
+            if snapshot.get('server_url') != self.server_url:
+                logger.warning('Ignoring {0} {1} stored for another server'.format(self.description, self.path))
+                return False
+            self.from_snapshot(snapshot)
+            self.loaded_mtime = mtime
+            return True
+
+    def save(self):
+        with self.lock:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            payload = json.dumps(dict(self.to_snapshot(), server_url=self.server_url), separators=(',', ':'))
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as raw_file:
+                    if self.compressed:
+                        with gzip.GzipFile(fileobj=raw_file, mode='wb') as snapshot_file:
+                            snapshot_file.write(payload.encode('utf-8'))
+                    else:
+                        raw_file.write(payload.encode('utf-8'))
+                os.replace(tmp_path, self.path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.loaded_mtime = os.path.getmtime(self.path)
+
+
+def get_snapshot(snapshot_class, server_url, path):
+    """Return the process-wide snapshot_class instance for path, replacing it when the server URL changes."""
+    with _snapshots_lock:
+        snapshot = _snapshots.get((snapshot_class, path))
+        if snapshot is None or snapshot.server_url != server_url:
+            snapshot = _snapshots[(snapshot_class, path)] = snapshot_class(server_url, path)
+        return snapshot
@@ -0,0 +1,126 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+# Load-test every entry in the operations dict against the local WhatsUp Gold simulator.
+# Run from the connector directory: python tests/benchmarks/bench_operations.py --concurrency 16 --requests 400
+
+import os
+import sys
+import json
+import math
+import argparse
+import importlib
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+current_directory = os.path.dirname(__file__)
+tests_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(tests_directory, os.pardir, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+sys.path.insert(0, tests_directory)
+
+from wug_simulator import WUGSimulator
+
+module_name = 'progress-whatsup-gold_1_0_0.operations'
+conn_operations_module = importlib.import_module(module_name)
+operations = conn_operations_module.operations
+
+with open(os.path.join(tests_directory, 'config_and_params.json'), 'r') as file:
+    params = json.load(file)
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    rank = math.ceil(percent / 100.0 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def build_config(simulator):
+    config = dict(params.get('config')[0])
+    config.update({'resource': simulator.url, 'username': simulator.state.username,
+                   'password': simulator.state.password, 'verify_ssl': False, 'config_id': 'benchmark'})
+    return config
+
+
+def call_operation(name, config, input_params):
+    config = dict(config)
+    if name == 'check_health':
+        connector_info = config.pop('connector_info')
+        return operations[name](config, connector_info)
+    return operations[name](config, dict(input_params))
+
+
+def run_operation(name, config, input_params, total, concurrency):
+    latencies, errors = [], 0
+
+    def timed_call(_):
+        started = perf_counter()
+        try:
+            call_operation(name, config, input_params)
+            return perf_counter() - started, None
+        except Exception as err:
+            return perf_counter() - started, err
+
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for latency, error in executor.map(timed_call, range(total)):
+            latencies.append(latency)
+            errors += 1 if error else 0
+    elapsed = perf_counter() - started
+    latencies.sort()
+    return {
+        'operation': name,
+        'requests': total,
+        'errors': errors,
+        'rps': total / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark connector operations against the WhatsUp Gold simulator')
+    parser.add_argument('--requests', type=int, default=200, help='Calls per operation')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.005, help='Simulated server latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.005)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--token-ttl', type=int, default=3600)
+    parser.add_argument('--no-etags', action='store_true', help='Disable conditional GET support in the simulator')
+    parser.add_argument('--no-compression', action='store_true', help='Disable response compression in the simulator')
+    parser.add_argument('--operations', nargs='*', default=list(operations))
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    with WUGSimulator(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      token_ttl=args.token_ttl, etags=not args.no_etags,
+                      compression=not args.no_compression) as simulator:
+        config = build_config(simulator)
+        connector_info = config.pop('connector_info')
+        operations['check_health'](config, connector_info)
+        config['connector_info'] = connector_info
+        results = []
+        for name in args.operations:
+            input_params = (params.get(name) or [{}])[0]
+            results.append(run_operation(name, config, input_params, args.requests, args.concurrency))
+        counters = dict(simulator.state.counters)
+
+    if args.json:
+        print(json.dumps({'results': results, 'server': counters}, indent=4))
+        return
+    print('{0:<36} {1:>8} {2:>7} {3:>10} {4:>10} {5:>10} {6:>10}'.format(
+        'operation', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for result in results:
+        print('{operation:<36} {requests:>8} {errors:>7} {rps:>10.1f} {p50_ms:>10.2f} {p95_ms:>10.2f} '
+              '{p99_ms:>10.2f}'.format(**result))
+    print('server: {0}'.format(counters))
+
+
+if __name__ == '__main__':
+    main()
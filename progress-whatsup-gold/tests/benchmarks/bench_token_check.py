@@ -0,0 +1,62 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+# Micro-benchmark of the per-call token expiry check done by WhatsUpGoldAuth.validate_token.
+# Run from the connector directory: python tests/benchmarks/bench_token_check.py
+
+import os
+import sys
+import importlib
+from time import time, ctime
+from timeit import repeat
+from datetime import datetime
+
+current_directory = os.path.dirname(__file__)
+grandparent_directory = os.path.abspath(os.path.join(current_directory, os.pardir, os.pardir, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+
+module_name = 'progress-whatsup-gold_1_0_0.whatsup_gold_api_auth'
+auth_module = importlib.import_module(module_name)
+
+NUMBER = 100000
+
+config = {
+    'resource': 'https://wug.example.com',
+    'username': 'bench',
+    'password': 'bench',
+    'verify_ssl': False,
+    'accessToken': 'token',
+    'refresh_token': 'refresh',
+    'expiresOn': time() + 3600,
+    'config_id': 'bench'
+}
+connector_info = {'connector_name': 'progress-whatsup-gold', 'connector_version': '1.0.0'}
+
+
+def legacy_expiry_check():
+    # Previous implementation: epoch -> ctime string -> strptime -> epoch on every call
+    expires_ts = datetime.strptime(ctime(config['expiresOn']), "%a %b %d %H:%M:%S %Y").timestamp()
+    return time() > float(expires_ts)
+
+
+def token_state_expiry_check():
+    return auth_module.TokenState.from_config(config).is_expired(time())
+
+
+def report(label, func):
+    best = min(repeat(func, number=NUMBER, repeat=5))
+    per_call = best / NUMBER * 1e6
+    print('{0:<32} {1:8.3f} us/call'.format(label, per_call))
+    return per_call
+
+
+if __name__ == '__main__':
+    wg_auth = auth_module.WhatsUpGoldAuth(config)
+    before = report('legacy ctime/strptime check', legacy_expiry_check)
+    after = report('TokenState check', token_state_expiry_check)
+    report('validate_token (valid token)', lambda: wg_auth.validate_token(config, connector_info))
+    print('expiry check speedup: {0:.1f}x'.format(before / after))
@@ -0,0 +1,74 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import sys
+import importlib
+
+current_directory = os.path.dirname(__file__)
+parent_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(parent_directory, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+
+columnar_module = importlib.import_module('progress-whatsup-gold_1_0_0.columnar')
+
+RECORDS = [
+    {'id': '1', 'stateName': 'Up', 'avgPercent': 10.5, 'series': [1, 2]},
+    {'id': '1', 'stateName': 'Down', 'avgPercent': None},
+    {'id': '1', 'stateName': 'Up', 'avgPercent': 30, 'notes': 'rebooted'},
+    {'id': '1', 'stateName': None, 'avgPercent': 40},
+    {'id': '1', 'stateName': 'Up', 'avgPercent': 50}
+]
+
+
+def test_round_trip_restores_the_records_exactly():
+    assert columnar_module.from_columnar(columnar_module.to_columnar(RECORDS)) == RECORDS
+
+
+def test_columns_are_listed_in_first_seen_field_order():
+    table = columnar_module.to_columnar(RECORDS)
+    assert table['format'] == 'columnar'
+    assert table['length'] == 5
+    assert table['fields'] == ['id', 'stateName', 'avgPercent', 'series', 'notes']
+    assert table['columns']['avgPercent'] == [10.5, None, 30, 40, 50]
+
+
+def test_repetitive_strings_are_dictionary_encoded():
+    table = columnar_module.to_columnar(RECORDS)
+    assert table['dictionaries']['id'] == ['1']
+    assert table['columns']['id'] == [0, 0, 0, 0, 0]
+    assert table['dictionaries']['stateName'] == ['Up', 'Down']
+    assert table['columns']['stateName'] == [0, 1, 0, -1, 0]
+    assert 'notes' not in table['dictionaries']
+
+
+def test_missing_fields_are_listed_as_absent():
+    table = columnar_module.to_columnar(RECORDS)
+    assert table['absent'] == {'series': [1, 2, 3, 4], 'notes': [0, 1, 3, 4]}
+
+
+def test_empty_record_list():
+    table = columnar_module.to_columnar([])
+    assert table == {'format': 'columnar', 'length': 0, 'fields': [], 'columns': {}}
+    assert columnar_module.from_columnar(table) == []
+
+
+def test_columnar_result_converts_nested_report_results():
+    result = {'data': [{'device_id': '1', 'report_type': 'cpu', 'data': [dict(record) for record in RECORDS]}],
+              'errors': []}
+    converted = columnar_module.columnar_result(result)
+    table = converted['data']
+    assert table['fields'] == ['device_id', 'report_type', 'data']
+    assert columnar_module.from_columnar(table['columns']['data'][0]) == RECORDS
+    assert converted['errors'] == []
+
+
+def test_columnar_result_converts_per_device_results():
+    result = {'data': {'1': {'data': [dict(record) for record in RECORDS]}, '2': {'message': 'Not Found'}}}
+    converted = columnar_module.columnar_result(result)
+    assert columnar_module.from_columnar(converted['data']['1']['data']) == RECORDS
+    assert converted['data']['2'] == {'message': 'Not Found'}
@@ -0,0 +1,77 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import sys
+import tempfile
+import importlib
+
+current_directory = os.path.dirname(__file__)
+parent_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(parent_directory, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+
+cursors_module = importlib.import_module('progress-whatsup-gold_1_0_0.cursors')
+
+SERVER_URL = 'https://wug.example.com'
+
+
+def state_change(minute, state):
+    return {'id': '1', 'startTimeUtc': '2024-01-01T00:{0:02d}:00Z'.format(minute), 'stateName': state}
+
+
+def cursor_store(tmp_path):
+    return cursors_module.CursorStore(SERVER_URL, str(tmp_path / 'cursors.json'))
+
+
+def test_advance_returns_every_record_on_the_first_poll(tmp_path):
+    store = cursor_store(tmp_path)
+    records = [state_change(5, 'Down'), state_change(1, 'Up')]
+    new_records, cursor = store.advance('1', 'state-change', records)
+    assert new_records == [records[1], records[0]]
+    assert cursor['last_seen_utc'] == '2024-01-01T00:05:00Z'
+
+
+def test_advance_skips_records_already_seen(tmp_path):
+    store = cursor_store(tmp_path)
+    store.advance('1', 'state-change', [state_change(1, 'Up'), state_change(5, 'Down')])
+    new_records, cursor = store.advance('1', 'state-change', [state_change(5, 'Down'), state_change(7, 'Up')])
+    assert new_records == [state_change(7, 'Up')]
+    assert cursor['last_seen_utc'] == '2024-01-01T00:07:00Z'
+
+
+def test_advance_keeps_new_records_sharing_the_boundary_timestamp(tmp_path):
+    store = cursor_store(tmp_path)
+    store.advance('1', 'state-change', [state_change(5, 'Down')])
+    new_records, cursor = store.advance('1', 'state-change', [state_change(5, 'Down'), state_change(5, 'Up')])
+    assert new_records == [state_change(5, 'Up')]
+    assert len(cursor['boundary_keys']) == 2
+
+
+def test_advance_without_new_records_keeps_the_cursor(tmp_path):
+    store = cursor_store(tmp_path)
+    _, cursor = store.advance('1', 'state-change', [state_change(5, 'Down')])
+    assert store.advance('1', 'state-change', [state_change(5, 'Down'), {'id': '1'}]) == ([], cursor)
+
+
+def test_cursors_are_kept_per_device_and_report_type(tmp_path):
+    store = cursor_store(tmp_path)
+    store.advance('1', 'state-change', [state_change(5, 'Down')])
+    assert store.advance('2', 'state-change', [state_change(1, 'Up')])[0] == [state_change(1, 'Up')]
+    assert store.get('1', 'cpu-utilization') is None
+
+
+def test_advance_is_persisted_for_other_processes(tmp_path):
+    cursor_store(tmp_path).advance('1', 'state-change', [state_change(5, 'Down')])
+    assert cursor_store(tmp_path).get('1', 'state-change')['last_seen_utc'] == '2024-01-01T00:05:00Z'
+
+
+def test_default_cursor_path_is_private(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    directory = os.path.dirname(cursors_module.default_cursor_path(SERVER_URL))
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
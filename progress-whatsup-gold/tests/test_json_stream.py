@@ -0,0 +1,78 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import sys
+import json
+import pytest
+import importlib
+
+current_directory = os.path.dirname(__file__)
+parent_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(parent_directory, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+
+json_stream_module = importlib.import_module('progress-whatsup-gold_1_0_0.json_stream')
+JSONArrayStream = json_stream_module.JSONArrayStream
+
+PAGE = {
+    'paging': {'pageId': '0', 'nextPageId': '2', 'size': 2},
+    'data': [{'id': '1', 'avgPercent': 12.5, 'deviceName': 'café', 'series': [1, -2e3, None, True]},
+             {'id': '2', 'avgPercent': 1234567, 'deviceName': 'sw-2', 'series': []}],
+    'trailer': 'after'
+}
+
+
+def chunked(text, size):
+    body = text.encode('utf-8')
+    return [body[offset:offset + size] for offset in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 4096])
+def test_records_and_fields_survive_any_chunk_boundary(chunk_size):
+    stream = JSONArrayStream(chunked(json.dumps(PAGE, ensure_ascii=False), chunk_size))
+    assert list(stream) == PAGE['data']
+    assert stream.fields == {'paging': PAGE['paging'], 'trailer': 'after'}
+
+
+def test_fields_before_the_array_are_available_while_iterating():
+    stream = JSONArrayStream(chunked(json.dumps(PAGE), 16))
+    next(stream)
+    assert stream.fields == {'paging': PAGE['paging']}
+
+
+def test_other_array_key_and_whitespace():
+    stream = JSONArrayStream(['{ "items" : [ 1 ,\n 2 ] , "data" : [3] }'], 'items')
+    assert list(stream) == [1, 2]
+    assert stream.fields == {'data': [3]}
+
+
+def test_empty_array():
+    stream = JSONArrayStream([b'{"data": [], "paging": {}}'])
+    assert list(stream) == []
+    assert stream.fields == {'paging': {}}
+
+
+@pytest.mark.parametrize("body", ['{"data": [1, 2', '[1, 2]', '{"data": [1, }', ''])
+def test_malformed_bodies_raise_value_error(body):
+    with pytest.raises(ValueError):
+        list(JSONArrayStream([body.encode('utf-8')]))
+
+
+def test_on_close_runs_once_after_iteration():
+    closed = []
+    stream = JSONArrayStream([b'{"data": [1]}'], on_close=lambda: closed.append(True))
+    list(stream)
+    stream.close()
+    assert closed == [True]
+
+
+def test_on_close_runs_when_closed_before_the_first_record():
+    closed = []
+    stream = JSONArrayStream([b'{"data": [1]}'], on_close=lambda: closed.append(True))
+    stream.close()
+    assert closed == [True]
@@ -411,3 +411,177 @@ def test_get_device_report_invalid_limit(valid_configuration_with_token):
     with pytest.raises(ConnectorError):
         operations['get_device_report'](valid_configuration_with_token.copy(), input_params)
     
+
+@pytest.mark.get_device_reports
+@pytest.mark.parametrize("input_params", params['get_device_reports'])
+def test_get_device_reports_success(valid_configuration_with_token, input_params):
+    logger.info("params: {0}".format(input_params))
+    assert operations['get_device_reports'](valid_configuration_with_token.copy(), input_params.copy())
+  
+    
+# Ensure that the provided input_params yield the correct output schema, or adjust the index in the list below.
+# Add logic for validating conditional_output_schema or if schema is other than dict.
+@pytest.mark.get_device_reports
+@pytest.mark.schema_validation
+def test_validate_get_device_reports_output_schema(valid_configuration_with_token):
+    input_params = params.get('get_device_reports')[0].copy()
+    schema = {}
+    for operation in info_json.get("operations"):
+        if operation.get('operation') == 'get_device_reports':
+            if operation.get('conditional_output_schema'):
+                pytest.skip("Skipping test because conditional_output_schema is not supported.")
+            else:
+                schema = operation.get('output_schema')
+            break
+    logger.info("output_schema: {0}".format(schema))
+    resp = operations['get_device_reports'](valid_configuration_with_token.copy(), input_params)
+    if isinstance(resp, dict) and isinstance(schema, dict):
+        assert resp.keys() == schema.keys()
+    else:
+        pytest.skip("Skipping test because output_schema is not a dict.")
+    
+
+@pytest.mark.get_device_360
+@pytest.mark.parametrize("input_params", params['get_device_360'])
+def test_get_device_360_success(valid_configuration_with_token, input_params):
+    logger.info("params: {0}".format(input_params))
+    assert operations['get_device_360'](valid_configuration_with_token.copy(), input_params.copy())
+  
+    
+# Ensure that the provided input_params yield the correct output schema, or adjust the index in the list below.
+# Add logic for validating conditional_output_schema or if schema is other than dict.
+@pytest.mark.get_device_360
+@pytest.mark.schema_validation
+def test_validate_get_device_360_output_schema(valid_configuration_with_token):
+    input_params = params.get('get_device_360')[0].copy()
+    schema = {}
+    for operation in info_json.get("operations"):
+        if operation.get('operation') == 'get_device_360':
+            if operation.get('conditional_output_schema'):
+                pytest.skip("Skipping test because conditional_output_schema is not supported.")
+            else:
+                schema = operation.get('output_schema')
+            break
+    logger.info("output_schema: {0}".format(schema))
+    resp = operations['get_device_360'](valid_configuration_with_token.copy(), input_params)
+    if isinstance(resp, dict) and isinstance(schema, dict):
+        assert resp.keys() == schema.keys()
+    else:
+        pytest.skip("Skipping test because output_schema is not a dict.")
+    
+
+@pytest.mark.get_connector_metrics
+@pytest.mark.parametrize("input_params", params['get_connector_metrics'])
+def test_get_connector_metrics_success(valid_configuration_with_token, input_params):
+    logger.info("params: {0}".format(input_params))
+    assert operations['get_connector_metrics'](valid_configuration_with_token.copy(), input_params.copy())
+  
+    
+# Ensure that the provided input_params yield the correct output schema, or adjust the index in the list below.
+# Add logic for validating conditional_output_schema or if schema is other than dict.
+@pytest.mark.get_connector_metrics
+@pytest.mark.schema_validation
+def test_validate_get_connector_metrics_output_schema(valid_configuration_with_token):
+    input_params = params.get('get_connector_metrics')[0].copy()
+    schema = {}
+    for operation in info_json.get("operations"):
+        if operation.get('operation') == 'get_connector_metrics':
+            if operation.get('conditional_output_schema'):
+                pytest.skip("Skipping test because conditional_output_schema is not supported.")
+            else:
+                schema = operation.get('output_schema')
+            break
+    logger.info("output_schema: {0}".format(schema))
+    resp = operations['get_connector_metrics'](valid_configuration_with_token.copy(), input_params)
+    if isinstance(resp, dict) and isinstance(schema, dict):
+        assert resp.keys() == schema.keys()
+    else:
+        pytest.skip("Skipping test because output_schema is not a dict.")
+    
+
+@pytest.mark.build_device_inventory
+@pytest.mark.parametrize("input_params", params['build_device_inventory'])
+def test_build_device_inventory_success(valid_configuration_with_token, input_params):
+    logger.info("params: {0}".format(input_params))
+    assert operations['build_device_inventory'](valid_configuration_with_token.copy(), input_params.copy())
+  
+    
+# Ensure that the provided input_params yield the correct output schema, or adjust the index in the list below.
+# Add logic for validating conditional_output_schema or if schema is other than dict.
+@pytest.mark.build_device_inventory
+@pytest.mark.schema_validation
+def test_validate_build_device_inventory_output_schema(valid_configuration_with_token):
+    input_params = params.get('build_device_inventory')[0].copy()
+    schema = {}
+    for operation in info_json.get("operations"):
+        if operation.get('operation') == 'build_device_inventory':
+            if operation.get('conditional_output_schema'):
+                pytest.skip("Skipping test because conditional_output_schema is not supported.")
+            else:
+                schema = operation.get('output_schema')
+            break
+    logger.info("output_schema: {0}".format(schema))
+    resp = operations['build_device_inventory'](valid_configuration_with_token.copy(), input_params)
+    if isinstance(resp, dict) and isinstance(schema, dict):
+        assert resp.keys() == schema.keys()
+    else:
+        pytest.skip("Skipping test because output_schema is not a dict.")
+    
+
+@pytest.mark.lookup_device_inventory
+@pytest.mark.parametrize("input_params", params['lookup_device_inventory'])
+def test_lookup_device_inventory_success(valid_configuration_with_token, input_params):
+    logger.info("params: {0}".format(input_params))
+    assert operations['lookup_device_inventory'](valid_configuration_with_token.copy(), input_params.copy())
+  
+    
+# Ensure that the provided input_params yield the correct output schema, or adjust the index in the list below.
+# Add logic for validating conditional_output_schema or if schema is other than dict.
+@pytest.mark.lookup_device_inventory
+@pytest.mark.schema_validation
+def test_validate_lookup_device_inventory_output_schema(valid_configuration_with_token):
+    input_params = params.get('lookup_device_inventory')[0].copy()
+    schema = {}
+    for operation in info_json.get("operations"):
+        if operation.get('operation') == 'lookup_device_inventory':
+            if operation.get('conditional_output_schema'):
+                pytest.skip("Skipping test because conditional_output_schema is not supported.")
+            else:
+                schema = operation.get('output_schema')
+            break
+    logger.info("output_schema: {0}".format(schema))
+    resp = operations['lookup_device_inventory'](valid_configuration_with_token.copy(), input_params)
+    if isinstance(resp, dict) and isinstance(schema, dict):
+        assert resp.keys() == schema.keys()
+    else:
+        pytest.skip("Skipping test because output_schema is not a dict.")
+    
+
+@pytest.mark.resolve_device
+@pytest.mark.parametrize("input_params", params['resolve_device'])
+def test_resolve_device_success(valid_configuration_with_token, input_params):
+    logger.info("params: {0}".format(input_params))
+    assert operations['resolve_device'](valid_configuration_with_token.copy(), input_params.copy())
+  
+    
+# Ensure that the provided input_params yield the correct output schema, or adjust the index in the list below.
+# Add logic for validating conditional_output_schema or if schema is other than dict.
+@pytest.mark.resolve_device
+@pytest.mark.schema_validation
+def test_validate_resolve_device_output_schema(valid_configuration_with_token):
+    input_params = params.get('resolve_device')[0].copy()
+    schema = {}
+    for operation in info_json.get("operations"):
+        if operation.get('operation') == 'resolve_device':
+            if operation.get('conditional_output_schema'):
+                pytest.skip("Skipping test because conditional_output_schema is not supported.")
+            else:
+                schema = operation.get('output_schema')
+            break
+    logger.info("output_schema: {0}".format(schema))
+    resp = operations['resolve_device'](valid_configuration_with_token.copy(), input_params)
+    if isinstance(resp, dict) and isinstance(schema, dict):
+        assert resp.keys() == schema.keys()
+    else:
+        pytest.skip("Skipping test because output_schema is not a dict.")
+    
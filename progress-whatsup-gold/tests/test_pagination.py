@@ -0,0 +1,58 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import sys
+import importlib
+
+current_directory = os.path.dirname(__file__)
+parent_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(parent_directory, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+
+conn_operations_module = importlib.import_module('progress-whatsup-gold_1_0_0.operations')
+
+
+class PagedClient:
+    """Serves pages from a dict of page ID to next page ID, recording the page IDs requested."""
+
+    def __init__(self, next_pages):
+        self.next_pages = next_pages
+        self.requested = []
+
+    def make_rest_call(self, config, endpoint=None, params=None, **options):
+        page_id = params.get('pageId')
+        self.requested.append(page_id)
+        return {'paging': {'pageId': page_id, 'nextPageId': self.next_pages.get(page_id)}, 'data': [page_id]}
+
+
+def fetch_all(client, **params):
+    return conn_operations_module.fetch_pages(client, {}, 'devices/1/attributes/-', dict(params, fetch_all_pages=True))
+
+
+def test_fetch_all_pages_follows_next_page_ids():
+    client = PagedClient({None: '10', '10': '20'})
+    result = fetch_all(client)
+    assert result['data'] == [None, '10', '20']
+    assert result['paging']['pageCount'] == 3
+
+
+def test_fetch_all_pages_stops_when_a_page_id_repeats():
+    client = PagedClient({None: '10', '10': '20', '20': '10'})
+    result = fetch_all(client)
+    assert client.requested == [None, '10', '20']
+    assert result['paging']['pageCount'] == 3
+
+
+def test_fetch_all_pages_stops_when_the_server_returns_the_same_page():
+    client = PagedClient({'5': '5'})
+    assert fetch_all(client, pageId='5')['data'] == ['5']
+
+
+def test_fetch_all_pages_honours_max_pages():
+    client = PagedClient({None: '10', '10': '20'})
+    assert fetch_all(client, max_pages=2)['data'] == [None, '10']
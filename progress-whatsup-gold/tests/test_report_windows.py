@@ -0,0 +1,67 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import sys
+import importlib
+
+current_directory = os.path.dirname(__file__)
+parent_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(parent_directory, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+
+report_windows_module = importlib.import_module('progress-whatsup-gold_1_0_0.report_windows')
+conn_operations_module = importlib.import_module('progress-whatsup-gold_1_0_0.operations')
+
+HOUR = 3600
+WINDOWED_CONFIG = {'report_window_minutes': 60}
+SEVEN_HOURS = {'range': 'custom', 'rangeStartUtc': '2024-01-01T00:30:00Z', 'rangeEndUtc': '2024-01-01T07:30:00Z'}
+
+
+def test_split_range_aligns_windows_to_the_grid():
+    windows = report_windows_module.split_range(HOUR // 2, 3 * HOUR + 60, HOUR, settled_before=10 * HOUR)
+    assert windows == [(HOUR // 2, HOUR, False), (HOUR, 2 * HOUR, True), (2 * HOUR, 3 * HOUR, True),
+                       (3 * HOUR, 3 * HOUR + 60, False)]
+
+
+def test_split_range_does_not_cache_unsettled_windows():
+    windows = report_windows_module.split_range(0, 2 * HOUR, HOUR, settled_before=HOUR + 1)
+    assert windows == [(0, HOUR, True), (HOUR, 2 * HOUR, False)]
+
+
+def test_split_range_of_an_empty_range():
+    assert report_windows_module.split_range(HOUR, HOUR, HOUR, settled_before=0) == []
+
+
+def test_merge_records_sorts_by_time_and_drops_boundary_duplicates():
+    first = [{'pollTimeUtc': '2024-01-01T00:55:00Z', 'avgPercent': 2},
+             {'pollTimeUtc': '2024-01-01T00:50:00Z', 'avgPercent': 1}]
+    second = [{'pollTimeUtc': '2024-01-01T00:55:00Z', 'avgPercent': 2},
+              {'startTimeUtc': '2024-01-01T01:00:00Z', 'stateName': 'Up'}]
+    merged = report_windows_module.merge_records([first, second])
+    assert merged == [first[1], first[0], second[1]]
+
+
+def test_report_windows_is_disabled_by_default():
+    assert conn_operations_module.report_windows({}, dict(SEVEN_HOURS, fetch_all_pages=True)) is None
+
+
+def test_report_windows_splits_long_ranges_when_fetching_all_pages():
+    windows = conn_operations_module.report_windows(WINDOWED_CONFIG, dict(SEVEN_HOURS, fetch_all_pages=True))
+    assert len(windows) == 8
+
+
+def test_report_windows_keeps_the_callers_paging():
+    report_windows = conn_operations_module.report_windows
+    assert report_windows(WINDOWED_CONFIG, dict(SEVEN_HOURS, limit=10, pageId='20')) is None
+    assert report_windows(WINDOWED_CONFIG, dict(SEVEN_HOURS, fetch_all_pages=True, pageId='20')) is None
+    assert report_windows(WINDOWED_CONFIG, dict(SEVEN_HOURS, fetch_all_pages=True, max_pages=2)) is None
+
+
+def test_report_windows_ignores_short_ranges():
+    params = dict(SEVEN_HOURS, rangeEndUtc='2024-01-01T01:00:00Z', fetch_all_pages=True)
+    assert conn_operations_module.report_windows(WINDOWED_CONFIG, params) is None
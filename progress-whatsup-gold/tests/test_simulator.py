@@ -0,0 +1,95 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+# Runs the operations end to end against the local WhatsUp Gold simulator; no WhatsUp Gold server is needed.
+
+import os
+import sys
+import pytest
+import importlib
+
+current_directory = os.path.dirname(__file__)
+parent_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(parent_directory, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+sys.path.insert(0, current_directory)
+
+from wug_simulator import WUGSimulator
+
+conn_operations_module = importlib.import_module('progress-whatsup-gold_1_0_0.operations')
+operations = conn_operations_module.operations
+
+CONNECTOR_INFO = {'connector_name': 'progress-whatsup-gold', 'connector_version': '1.0.0'}
+RECORDS_PER_LIST = 40
+
+
+@pytest.fixture(scope="module")
+def simulator():
+    with WUGSimulator(device_count=10, records_per_list=RECORDS_PER_LIST, report_records=60) as simulator:
+        yield simulator
+
+
+@pytest.fixture
+def simulator_config(simulator, request):
+    # A configuration per test keeps the clients, and their cached responses, of other tests out of the way
+    config = {'resource': simulator.url, 'username': simulator.state.username, 'password': simulator.state.password,
+              'verify_ssl': False, 'config_id': request.node.name, 'async_io': False}
+    operations['check_health'](config, dict(CONNECTOR_INFO))
+    return config
+
+
+def test_check_health(simulator_config):
+    assert operations['check_health'](dict(simulator_config), dict(CONNECTOR_INFO))
+
+
+def test_get_device_overview(simulator_config):
+    result = operations['get_device_overview'](dict(simulator_config), {'device_id': '3'})
+    assert result['data']['id'] == '3'
+
+
+@pytest.mark.parametrize("async_io", [False, True])
+def test_multiple_devices_report_unknown_devices_under_errors(simulator_config, async_io):
+    config = dict(simulator_config, async_io=async_io)
+    result = operations['get_device_summary'](config, {'device_id': '1, 2, 999'})
+    assert sorted(result['data']) == ['1', '2']
+    assert result['errors'] == {'999': 'Not Found'}
+
+
+def test_fetch_all_pages(simulator_config):
+    result = operations['get_device_attributes'](dict(simulator_config), {'device_id': '1', 'limit': 15,
+                                                                          'fetch_all_pages': True})
+    assert result['paging']['pageCount'] == 3
+    assert len(result['data']) == RECORDS_PER_LIST
+
+
+def test_single_page_keeps_the_next_page_id(simulator_config):
+    result = operations['get_device_attributes'](dict(simulator_config), {'device_id': '1', 'limit': 15})
+    assert len(result['data']) == 15
+    assert result['paging']['nextPageId'] == '15'
+
+
+def test_streamed_device_report(simulator_config):
+    result = operations['get_device_report'](dict(simulator_config), {
+        'device_id': '2', 'report_type': 'CPU Utilization Report', 'range': 'Custom Duration',
+        'rangeStartUtc': '2024-01-01T00:00:00Z', 'rangeEndUtc': '2024-01-01T07:00:00Z', 'limit': 10, 'pageId': '20'})
+    assert len(result['data']) == 10
+    assert result['paging']['nextPageId'] == '30'
+
+
+def test_columnar_output(simulator_config):
+    result = operations['get_device_monitors'](dict(simulator_config), {'device_id': '1', 'limit': 5,
+                                                                        'output_format': 'Columnar'})
+    assert result['data']['format'] == 'columnar'
+    assert result['data']['length'] == 5
+
+
+def test_conditional_requests_reuse_unchanged_responses(simulator, simulator_config):
+    operations['get_device_attributes'](dict(simulator_config), {'device_id': '4'})
+    not_modified = simulator.state.counters['not_modified']
+    result = operations['get_device_attributes'](dict(simulator_config), {'device_id': '4'})
+    assert simulator.state.counters['not_modified'] == not_modified + 1
+    assert len(result['data']) == 25
@@ -0,0 +1,123 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import sys
+import asyncio
+import pytest
+import importlib
+import threading
+from connectors.core.connector import ConnectorError
+
+current_directory = os.path.dirname(__file__)
+parent_directory = os.path.abspath(os.path.join(current_directory, os.pardir))
+grandparent_directory = os.path.abspath(os.path.join(parent_directory, os.pardir))
+sys.path.insert(0, str(grandparent_directory))
+
+throttle_module = importlib.import_module('progress-whatsup-gold_1_0_0.throttle')
+utils_module = importlib.import_module('progress-whatsup-gold_1_0_0.utils')
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(throttle_module, 'monotonic', clock)
+    return clock
+
+
+def test_token_bucket_allows_a_burst_then_spaces_requests(clock):
+    bucket = throttle_module.TokenBucket(rate=2, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_token_bucket_refills_with_time_up_to_the_burst(clock):
+    bucket = throttle_module.TokenBucket(rate=2, burst=2)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 0.5
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(0.5)
+    clock.now += 60
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_token_bucket_burst_is_at_least_one(clock):
+    bucket = throttle_module.TokenBucket(rate=0.5, burst=0)
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(2.0)
+
+
+def test_governor_without_limits_never_waits():
+    governor = throttle_module.ServerGovernor(0, 1, 0)
+    with governor.slot() as first, governor.slot() as second:
+        assert governor.in_flight == 2
+        assert first.wait < 0.1 and second.wait < 0.1
+    assert governor.in_flight == 0
+    assert governor.stats()['requests'] == 2
+
+
+def test_detached_slot_is_held_until_released():
+    governor = throttle_module.ServerGovernor(0, 1, 1)
+    with governor.slot() as held:
+        release = held.detach()
+    assert governor.in_flight == 1
+    release()
+    release()
+    assert governor.in_flight == 0
+
+
+def test_slot_wait_respects_the_operation_deadline():
+    governor = throttle_module.ServerGovernor(0, 1, 1)
+    with governor.slot():
+        with utils_module.operation_deadline({'operation_timeout': 0.05}):
+            with pytest.raises(ConnectorError):
+                governor.acquire()
+    assert governor.in_flight == 0
+
+
+def test_threads_and_coroutines_share_the_in_flight_cap():
+    governor = throttle_module.ServerGovernor(0, 1, 2)
+    peak, lock = [0], threading.Lock()
+
+    def observe():
+        with lock:
+            peak[0] = max(peak[0], governor.in_flight)
+
+    def thread_requests():
+        for _ in range(10):
+            with governor.slot():
+                observe()
+                threading.Event().wait(0.001)
+
+    async def coroutine_requests():
+        async def request():
+            async with governor.async_slot():
+                observe()
+                await asyncio.sleep(0.001)
+        await asyncio.gather(*(request() for _ in range(30)))
+
+    threads = [threading.Thread(target=thread_requests) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    asyncio.run(coroutine_requests())
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
+    assert governor.in_flight == 0
+    assert governor.stats()['requests'] == 60
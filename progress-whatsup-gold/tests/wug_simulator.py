@@ -0,0 +1,363 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+# Local stand-in for the WhatsUp Gold REST API used by the benchmarks.
+# Run standalone with: python tests/wug_simulator.py --port 9644 --latency 0.02
+
+import re
+import gzip
+import zlib
+import json
+import hashlib
+import random
+import secrets
+import argparse
+import threading
+from time import time, sleep
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPORT_TYPES = ('cpu-utilization', 'disk-utilization', 'memory-utilization', 'ping-availability',
+                'ping-response-time', 'state-change')
+STATES = ('Up', 'Down', 'Maintenance', 'Unknown')
+# Smaller bodies are sent uncompressed, as most servers do
+COMPRESSION_MIN_SIZE = 1024
+
+
+class SimulatorState:
+
+    def __init__(self, device_count=50, records_per_list=40, report_records=200, token_ttl=3600, latency=0.0,
+                 jitter=0.0, error_rate=0.0, error_status=503, retry_after=None, username='admin', password='admin',
+                 etags=True, compression=True):
+        self.device_count = device_count
+        self.records_per_list = records_per_list
+        self.report_records = report_records
+        self.token_ttl = token_ttl
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.username = username
+        self.password = password
+        # Validators for conditional GETs; touch() makes every resource look modified
+        self.etags = etags
+        # gzip/deflate bodies when the client asks for them; bytes_sent counts what crosses the wire
+        self.compression = compression
+        self.revision = 0
+        self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        self.access_tokens = {}
+        self.refresh_tokens = set()
+        self.counters = {'requests': 0, 'token_requests': 0, 'injected_errors': 0, 'not_modified': 0, 'bytes_sent': 0,
+                         'bytes_uncompressed': 0}
+        self.lock = threading.Lock()
+
+    def issue_token(self):
+        access_token, refresh_token = secrets.token_hex(16), secrets.token_hex(16)
+        with self.lock:
+            self.access_tokens[access_token] = time() + self.token_ttl
+            self.refresh_tokens.add(refresh_token)
+        return {'access_token': access_token, 'token_type': 'bearer', 'expires_in': self.token_ttl,
+                'refresh_token': refresh_token}
+
+    def is_authorized(self, header):
+        token = (header or '').replace('Bearer ', '', 1)
+        with self.lock:
+            expires = self.access_tokens.get(token)
+        return expires is not None and expires > time()
+
+    def touch(self):
+        with self.lock:
+            self.revision += 1
+            self.last_modified = max(datetime.now(timezone.utc).replace(microsecond=0),
+                                     self.last_modified + timedelta(seconds=1))
+
+    def count(self, key, value=1):
+        with self.lock:
+            self.counters[key] += value
+
+
+def _device(device_id):
+    return {
+        'id': str(device_id),
+        'name': 'device-{0}'.format(device_id),
+        'hostName': 'device-{0}.example.com'.format(device_id),
+        'networkAddress': '10.0.{0}.{1}'.format(device_id // 250, device_id % 250 + 1),
+        'description': 'Simulated device {0}'.format(device_id),
+        'role': 'Switch',
+        'brand': 'Simulated',
+        'os': 'SimOS',
+        'bestState': 'Up',
+        'worstState': STATES[device_id % len(STATES)],
+        'notes': '',
+        'totalActiveMonitors': 4,
+        'totalActiveMonitorsDown': device_id % 2,
+        'downActiveMonitors': []
+    }
+
+
+def _list_record(kind, device_id, index):
+    if kind == 'attributes':
+        return {'attributeId': str(index), 'name': 'Attribute{0}'.format(index), 'value': str(device_id * index),
+                'id': str(device_id)}
+    if kind == 'group':
+        return {'parentGroupId': '0', 'name': 'Group {0}'.format(index), 'description': '', 'id': str(index),
+                'details': {'groupType': 'static', 'monitorState': 'Up', 'childrenCount': 0,
+                            'deviceChildrenCount': 1, 'deviceDescendantCount': 1}}
+    return {'id': str(index), 'description': 'Monitor {0}'.format(index), 'type': 'active',
+            'monitorTypeId': str(index % 7), 'monitorTypeClassId': str(index % 3),
+            'monitorTypeName': 'Ping', 'isGlobal': index % 2 == 0}
+
+
+def _report_record(report_type, device_id, poll_time, index):
+    record = {'id': str(device_id), 'deviceName': 'device-{0}'.format(device_id),
+              'pollTimeUtc': poll_time.strftime('%Y-%m-%dT%H:%M:%SZ'), 'timeFromLastPollSeconds': 60}
+    value = round((device_id * 7 + index * 13) % 100 + random.random(), 2)
+    if report_type == 'state-change':
+        record.update({'startTimeUtc': record.pop('pollTimeUtc'), 'stateName': STATES[index % len(STATES)],
+                       'monitorTypeName': 'Ping', 'result': 'Changed'})
+    elif report_type in ('ping-availability', 'ping-response-time'):
+        record.update({'interfaceId': '1', 'avgMilliSec': value, 'minMilliSec': value / 2,
+                       'maxMilliSec': value * 2, 'packetsLost': index % 3, 'packetsSent': 10,
+                       'percentAvailable': 100 - (index % 5), 'percentPacketLoss': index % 5, 'series': []})
+    else:
+        record.update({'minPercent': value / 2, 'maxPercent': min(value * 1.5, 100), 'avgPercent': value,
+                       'series': [{'pollTimeUtc': record['pollTimeUtc'], 'avgPercent': value,
+                                   'minPercent': value / 2, 'maxPercent': min(value * 1.5, 100)}]})
+    return record
+
+
+def _parse_utc(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc)
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Keep-alive responses are written in several sends; with Nagle on, each one waits for the client's delayed ACK
+    disable_nagle_algorithm = True
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        if status == 200 and self.command == 'GET' and self.state.etags:
+            headers = dict(headers or {}, **self._validators(payload))
+            if self._not_modified(headers):
+                self.state.count('not_modified')
+                self.send_response(304)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                return
+        self.state.count('bytes_uncompressed', len(payload))
+        encoding = self._content_encoding(payload)
+        if encoding == 'gzip':
+            payload = gzip.compress(payload, compresslevel=6)
+        elif encoding == 'deflate':
+            payload = zlib.compress(payload, 6)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+            self.send_header('Vary', 'Accept-Encoding')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+        self.state.count('bytes_sent', len(payload))
+
+    def _content_encoding(self, payload):
+        if not self.state.compression or len(payload) < COMPRESSION_MIN_SIZE:
+            return None
+        accepted = [value.split(';')[0].strip().lower()
+                    for value in (self.headers.get('Accept-Encoding') or '').split(',')]
+        for encoding in ('gzip', 'deflate'):
+            if encoding in accepted:
+                return encoding
+        return None
+
+    def _validators(self, payload):
+        digest = hashlib.sha1(payload + str(self.state.revision).encode()).hexdigest()[:20]
+        return {'ETag': '"{0}"'.format(digest), 'Last-Modified': format_datetime(self.state.last_modified, usegmt=True)}
+
+    def _not_modified(self, validators):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            return validators['ETag'] in [tag.strip() for tag in if_none_match.split(',')] or if_none_match == '*'
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return self.state.last_modified <= parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _delay(self):
+        delay = self.state.latency + random.uniform(0, self.state.jitter)
+        if delay > 0:
+            sleep(delay)
+
+    def _inject_error(self):
+        if self.state.error_rate and random.random() < self.state.error_rate:
+            self.state.count('injected_errors')
+            headers = {'Retry-After': str(self.state.retry_after)} if self.state.retry_after is not None else None
+            self._send_json(self.state.error_status, {'error': {'message': 'Injected error'}}, headers)
+            return True
+        return False
+
+    def do_POST(self):
+        self.state.count('requests')
+        length = int(self.headers.get('Content-Length') or 0)
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        if urlsplit(self.path).path != '/api/v1/token':
+            return self._send_json(404, {'error': {'message': 'Not Found'}})
+        self.state.count('token_requests')
+        self._delay()
+        if form.get('grant_type') == 'password':
+            if form.get('username') != self.state.username or form.get('password') != self.state.password:
+                return self._send_json(400, {'error': 'invalid_grant', 'error_description': 'Invalid credentials'})
+        elif form.get('grant_type') == 'refresh_token':
+            with self.state.lock:
+                valid = form.get('refresh_token') in self.state.refresh_tokens
+                self.state.refresh_tokens.discard(form.get('refresh_token'))
+            if not valid:
+                return self._send_json(400, {'error': 'invalid_grant', 'error_description': 'Invalid refresh token'})
+        else:
+            return self._send_json(400, {'error': 'unsupported_grant_type', 'error_description': 'Unsupported'})
+        self._send_json(200, self.state.issue_token())
+
+    def do_GET(self):
+        self.state.count('requests')
+        url = urlsplit(self.path)
+        query = {key: values for key, values in parse_qs(url.query).items()}
+        self._delay()
+        if not self.state.is_authorized(self.headers.get('Authorization')):
+            return self._send_json(401, {'error': {'message': 'Authorization has been denied for this request.'}})
+        if self._inject_error():
+            return
+        group_match = re.match(r'^/api/v1/device-groups/(-?\d+)/devices/-$', url.path)
+        if group_match:
+            return self._send_page([_device(device_id) for device_id in range(1, self.state.device_count + 1)], query)
+        match = re.match(r'^/api/v1/devices/(\d+)(/.*)?$', url.path)
+        if not match or not 1 <= int(match.group(1)) <= self.state.device_count:
+            return self._send_json(404, {'error': {'message': 'Not Found'}})
+        device_id, resource = int(match.group(1)), match.group(2) or ''
+        if resource == '':
+            return self._send_json(200, {'data': _device(device_id)})
+        if resource == '/config/polling':
+            return self._send_json(200, {'data': {'pollingIntervalSeconds': 60, 'pollByHostName': False,
+                                                  'maintenance': {'enabled': False, 'manual': {'enabled': False}}}})
+        if resource == '/config/template':
+            device = _device(device_id)
+            return self._send_json(200, {'data': {'deviceCount': 1, 'errors': [], 'templates': [{
+                'templateId': str(device_id), 'displayName': device['name'], 'deviceType': device['role'],
+                'pollInterval': 60, 'os': device['os'], 'brand': device['brand'],
+                'interfaces': [{'defaultInterface': True, 'pollUsingNetworkName': False,
+                                'networkAddress': device['networkAddress'], 'networkName': device['hostName']}],
+                'attributes': [], 'groups': [{'parents': [], 'name': 'My Network'}]}]}})
+        list_match = re.match(r'^/(attributes|group|monitors)/-$', resource)
+        if list_match:
+            records = [_list_record(list_match.group(1), device_id, index)
+                       for index in range(self.state.records_per_list)]
+            return self._send_page(records, query)
+        report_match = re.match(r'^/reports/([a-z-]+)$', resource)
+        if report_match and report_match.group(1) in REPORT_TYPES:
+            return self._send_page(self._report(report_match.group(1), device_id, query), query)
+        self._send_json(404, {'error': {'message': 'Not Found'}})
+
+    def _report(self, report_type, device_id, query):
+        end = datetime.now(timezone.utc).replace(microsecond=0)
+        step = timedelta(minutes=5)
+        start = end - step * self.state.report_records
+        if query.get('range', [''])[0] == 'custom':
+            start = _parse_utc(query['rangeStartUtc'][0])
+            end = _parse_utc(query['rangeEndUtc'][0])
+        records, poll_time, index = [], start, 0
+        while poll_time < end:
+            records.append(_report_record(report_type, device_id, poll_time, index))
+            poll_time += step
+            index += 1
+        return records
+
+    def _send_page(self, records, query):
+        limit = int(query.get('limit', ['0'])[0] or 0) or 25
+        try:
+            offset = int(query.get('pageId', ['0'])[0] or 0)
+        except ValueError:
+            return self._send_json(400, {'error': {'message': 'Invalid pageId'}})
+        if limit < 0 or offset < 0:
+            return self._send_json(400, {'error': {'message': 'Invalid paging parameters'}})
+        page = records[offset:offset + limit]
+        paging = {'pageId': str(offset), 'size': len(page)}
+        if offset + limit < len(records):
+            paging['nextPageId'] = str(offset + limit)
+        self._send_json(200, {'paging': paging, 'data': page})
+
+
+class SimulatorServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Large accept backlog so bursts from the asyncio client are not delayed by SYN retransmits
+    request_queue_size = 1024
+
+
+class WUGSimulator:
+    """Run the simulated WhatsUp Gold API on a background thread."""
+
+    def __init__(self, host='127.0.0.1', port=0, **options):
+        self.state = SimulatorState(**options)
+        handler = type('BoundSimulatorHandler', (SimulatorHandler,), {'state': self.state})
+        self.server = SimulatorServer((host, port), handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{0}:{1}'.format(host, port)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulated WhatsUp Gold REST API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9644)
+    parser.add_argument('--devices', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.0, help='Base response latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random extra latency in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of GET requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--retry-after', type=int, default=None)
+    parser.add_argument('--token-ttl', type=int, default=3600, help='Access token lifetime in seconds')
+    parser.add_argument('--no-etags', action='store_true', help='Do not send ETag/Last-Modified or answer 304')
+    parser.add_argument('--no-compression', action='store_true', help='Always send uncompressed bodies')
+    args = parser.parse_args()
+    simulator = WUGSimulator(args.host, args.port, device_count=args.devices, latency=args.latency,
+                             jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status,
+                             retry_after=args.retry_after, token_ttl=args.token_ttl, etags=not args.no_etags,
+                             compression=not args.no_compression)
+    print('WhatsUp Gold simulator listening on {0}'.format(simulator.url))
+    try:
+        simulator.server.serve_forever()
+    except KeyboardInterrupt:
+        simulator.stop()
@@ -0,0 +1,216 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import asyncio
+import threading
+from collections import deque
+from time import monotonic, sleep
+from contextlib import contextmanager, asynccontextmanager
+from .constants import DEFAULT_RATE_LIMIT, DEFAULT_MAX_CONCURRENT_REQUESTS
+from .utils import get_config_number, remaining_time
+from connectors.core.connector import ConnectorError
+
+_governors = {}
+_governors_lock = threading.Lock()
+
+
+class TokenBucket:
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = self.burst
+        self.updated = monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token, returning how long the caller must wait before it is actually available."""
+        with self._lock:
+            ts_now = monotonic()
+            self.tokens = min(self.burst, self.tokens + (ts_now - self.updated) * self.rate)
+            self.updated = ts_now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class Slot:
+    """A held request slot; detach() keeps it past the with block, e.g. until a streamed body is read."""
+
+    def __init__(self, governor, wait):
+        self.governor = governor
+        self.wait = wait
+        self.detached = False
+        self._released = False
+        self._lock = threading.Lock()
+
+    def detach(self):
+        """Return a callable that releases the slot; calls after the first are ignored."""
+        self.detached = True
+        return self.release
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.governor.release()
+
+
+class _AsyncWaiter:
+    """Wakes a coroutine waiting for a request slot from whichever thread releases one."""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.future = self.loop.create_future()
+
+    def set(self):
+        self.loop.call_soon_threadsafe(self._grant)
+
+    def _grant(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class ServerGovernor:
+    """Client-side rate limit and in-flight cap shared by every request sent to one WhatsUp Gold server.
+
+    Threads and coroutines draw request slots from the same counter, so max_in_flight bounds synchronous and
+    asyncio requests together. A released slot is handed to the longest waiting caller of either kind.
+    """
+
+    def __init__(self, rate, burst, max_in_flight):
+        self.settings = (rate, burst, max_in_flight)
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.max_in_flight = max_in_flight
+        self.requests = 0
+        self.in_flight = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def _rate_limit_delay(self):
+        if not self.bucket:
+            return 0.0
+        delay = self.bucket.reserve()
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            raise ConnectorError('The operation deadline was exceeded while waiting for the rate limiter')
+        return delay
+
+    def _take_slot(self, waiter):
+        """Take a free slot, or queue waiter for the next released one; returns True when a slot was taken."""
+        with self._lock:
+            if self.max_in_flight <= 0 or (self.in_flight < self.max_in_flight and not self._waiters):
+                self.in_flight += 1
+                return True
+            self._waiters.append(waiter)
+            return False
+
+    def _cancel_wait(self, waiter):
+        """Stop waiting; returns False when release() already handed waiter a slot, which the caller now holds."""
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return True
+            return False
+
+    def _enter(self, wait):
+        with self._lock:
+            self.requests += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def acquire(self):
+        """Wait for the rate limiter and an in-flight slot; returns the seconds waited. Pair with release()."""
+        started = monotonic()
+        delay = self._rate_limit_delay()
+        if delay:
+            sleep(delay)
+        waiter = threading.Event()
+        if not self._take_slot(waiter):
+            remaining = remaining_time()
+            if not waiter.wait(max(remaining, 0) if remaining is not None else None) and self._cancel_wait(waiter):
+                raise ConnectorError('The operation deadline was exceeded while waiting for a request slot')
+        wait = monotonic() - started
+        self._enter(wait)
+        return wait
+
+    async def async_acquire(self):
+        """Asyncio counterpart of acquire(); waits without blocking the event loop."""
+        started = monotonic()
+        delay = self._rate_limit_delay()
+        if delay:
+            await asyncio.sleep(delay)
+        waiter = _AsyncWaiter()
+        if not self._take_slot(waiter):
+            remaining = remaining_time()
+            try:
+                await asyncio.wait_for(waiter.future, timeout=max(remaining, 0) if remaining is not None else None)
+            except BaseException as err:
+                if not self._cancel_wait(waiter):
+                    self.release()
+                if isinstance(err, asyncio.TimeoutError):
+                    raise ConnectorError('The operation deadline was exceeded while waiting for a request slot')
+                raise
+        wait = monotonic() - started
+        self._enter(wait)
+        return wait
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # Hand the slot over directly, so a new caller cannot take it ahead of the queue
+                self._waiters.popleft().set()
+            else:
+                self.in_flight -= 1
+
+    @contextmanager
+    def slot(self):
+        held = Slot(self, self.acquire())
+        try:
+            yield held
+        finally:
+            if not held.detached:
+                held.release()
+
+    @asynccontextmanager
+    async def async_slot(self):
+        """Asyncio counterpart of slot(); yields the seconds waited."""
+        wait = await self.async_acquire()
+        try:
+            yield wait
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'in_flight': self.in_flight,
+                'queue_wait_total_seconds': round(self.total_wait, 6),
+                'queue_wait_max_seconds': round(self.max_wait, 6),
+                'queue_wait_avg_seconds': round(self.total_wait / self.requests, 6) if self.requests else 0.0
+            }
+
+
+def get_governor(server_url, config):
+    rate = get_config_number(config, 'rate_limit', DEFAULT_RATE_LIMIT, float)
+    max_in_flight = get_config_number(config, 'max_concurrent_requests', DEFAULT_MAX_CONCURRENT_REQUESTS)
+    burst = get_config_number(config, 'rate_limit_burst', max(int(rate), 1))
+    settings = (rate, burst, max_in_flight)
+    with _governors_lock:
+        governor = _governors.get(server_url)
+        if governor is None or governor.settings != settings:
+            governor = ServerGovernor(rate, burst, max_in_flight)
+            _governors[server_url] = governor
+        return governor
+
+
+def get_governor_stats():
+    with _governors_lock:
+        return {server_url: governor.stats() for server_url, governor in _governors.items()}
@@ -0,0 +1,68 @@
+"""
+Copyright start
+MIT License
+Copyright (c) 2024 Fortinet Inc
+Copyright end
+"""
+
+import os
+import tempfile
+from time import monotonic, time
+from email.utils import parsedate_to_datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .constants import DEFAULT_OPERATION_TIMEOUT
+
+_operation_deadline = ContextVar('operation_deadline', default=None)
+
+
+def get_config_number(config, key, default, cast=int):
+    value = config.get(key)
+    try:
+        return cast(value) if value not in (None, '') else default
+    except (TypeError, ValueError):
+        return default
+
+
+@contextmanager
+def operation_deadline(config):
+    """Bound the total time of all requests made by one operation, retries included."""
+    timeout = get_config_number(config, 'operation_timeout', DEFAULT_OPERATION_TIMEOUT, float)
+    token = _operation_deadline.set(monotonic() + timeout if timeout else None)
+    try:
+        yield
+    finally:
+        _operation_deadline.reset(token)
+
+
+def remaining_time():
+    deadline = _operation_deadline.get()
+    return None if deadline is None else deadline - monotonic()
+
+
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        try:
+            return max((parsedate_to_datetime(value).timestamp() - time()), 0)
+        except (TypeError, ValueError):
+            return None
+
+
+def private_temp_dir():
+    """Return a per-user directory in the system temporary directory, readable only by its owner.
+
+    Raises OSError when the directory exists but belongs to another user or is open to others, so a local
+    user cannot pre-create it to read or plant connector state.
+    """
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    path = os.path.join(tempfile.gettempdir(), 'wug-connector-{0}'.format(uid if uid is not None else 'user'))
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.lstat(path)
+    if uid is not None and (status.st_uid != uid or status.st_mode & 0o077 or os.path.islink(path)):
+        raise OSError('Refusing to use {0}: it must be a directory owned by the current user with mode 0700'
+                      .format(path))
+    return path
@@ -5,16 +5,62 @@ Copyright (c) 2024 Fortinet Inc
 Copyright end
 """
 
-from requests import request
-from time import time, ctime
+import threading
+from time import time
 from datetime import datetime
 from connectors.core.connector import get_logger, ConnectorError
 from connectors.core.utils import update_connnector_config
+from .session_pool import get_session, pool_options
+from .constants import DEFAULT_TOKEN_REFRESH_SKEW, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .utils import get_config_number
+from .metrics import metrics
 
 logger = get_logger('progress-whatsup-gold')
 
 REFRESH_TOKEN_FLAG = False
 
+# Latest token per (host, username), shared so that concurrent requests reuse a single refresh
+_shared_tokens = {}
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def _get_refresh_lock(key):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(key, threading.Lock())
+
+
+def parse_expiry(expires):
+    """Return the token expiry as an epoch float; accepts the numeric and ctime-formatted legacy values."""
+    if isinstance(expires, (int, float)):
+        return float(expires)
+    if not expires:
+        return 0.0
+    try:
+        return float(expires)
+    except (TypeError, ValueError):
+        return datetime.strptime(expires, "%a %b %d %H:%M:%S %Y").timestamp()
+
+
+class TokenState:
+    __slots__ = ('access_token', 'refresh_token', 'expires_at')
+
+    def __init__(self, access_token, refresh_token, expires_at):
+        self.access_token = access_token
+        self.refresh_token = refresh_token
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_config(cls, connector_config):
+        return cls(connector_config.get('accessToken'), connector_config.get('refresh_token'),
+                   parse_expiry(connector_config.get('expiresOn')))
+
+    def is_expired(self, ts_now, skew=0):
+        return ts_now > self.expires_at - skew
+
+    def to_config(self):
+        return {'accessToken': self.access_token, 'expiresOn': self.expires_at, 'refresh_token': self.refresh_token}
+
 
 class WhatsUpGoldAuth:
 
@@ -26,11 +72,15 @@ class WhatsUpGoldAuth:
         self.password = config.get("password")
         self.verify_ssl = config.get("verify_ssl")
         self.token_url = self.host + "/api/v1/token"
+        self.pool_options = pool_options(config)
         self.refresh_token = ""
+        self.refresh_skew = get_config_number(config, "token_refresh_skew", DEFAULT_TOKEN_REFRESH_SKEW)
+        self.timeout = (get_config_number(config, "connect_timeout", DEFAULT_CONNECT_TIMEOUT, float),
+                        get_config_number(config, "read_timeout", DEFAULT_READ_TIMEOUT, float))
 
-    def convert_ts_epoch(self, ts):
-        datetime_object = datetime.strptime(ctime(ts), "%a %b %d %H:%M:%S %Y")
-        return datetime_object.timestamp()
+    @property
+    def session(self):
+        return get_session(self.host, self.verify_ssl, self.pool_options)
 
     def generate_token(self, REFRESH_TOKEN_FLAG):
         try:
@@ -44,29 +94,61 @@ class WhatsUpGoldAuth:
             logger.error("{0}".format(err))
             raise ConnectorError("{0}".format(err))
 
-    def validate_token(self, connector_config, connector_info):
-        ts_now = time()
-        if not connector_config.get('accessToken'):
-            logger.error('Error occurred while connecting server: Unauthorized')
-            raise ConnectorError('Error occurred while connecting server: Unauthorized')
-        expires = connector_config['expiresOn']
-        expires_ts = self.convert_ts_epoch(expires)
-        if ts_now > float(expires_ts):
-            REFRESH_TOKEN_FLAG = True
-            logger.info("Token expired at {0}".format(expires))
+    def _token_key(self):
+        return self.host, self.username
+
+    def _adopt_shared_token(self, connector_config, token_state):
+        shared = _shared_tokens.get(self._token_key())
+        if shared and shared.expires_at > token_state.expires_at:
+            connector_config.update(shared.to_config())
+            return shared
+        return token_state
+
+    def _refresh(self, connector_config, connector_info, token_state):
+        with _get_refresh_lock(self._token_key()):
+            if self._adopt_shared_token(connector_config, token_state) is not token_state:
+                logger.info("Token already refreshed by a concurrent request")
+                return
             self.refresh_token = connector_config["refresh_token"]
-            token_resp = self.generate_token(REFRESH_TOKEN_FLAG)
-            connector_config['accessToken'] = token_resp['accessToken']
-            connector_config['expiresOn'] = token_resp['expiresOn']
-            connector_config['refresh_token'] = token_resp.get('refresh_token')
+            token_resp = self.generate_token(True)
+            metrics.increment('token_refreshes')
+            token_state = TokenState(token_resp['accessToken'], token_resp.get('refresh_token'),
+                                     parse_expiry(token_resp['expiresOn']))
+            connector_config.update(token_state.to_config())
+            _shared_tokens[self._token_key()] = token_state
             update_connnector_config(connector_info['connector_name'], connector_info['connector_version'],
                                      connector_config,
                                      connector_config['config_id'])
 
-            return "Bearer {0}".format(connector_config.get('accessToken'))
+    def _refresh_in_background(self, connector_config, connector_info, token_state):
+        lock = _get_refresh_lock(self._token_key())
+        if not lock.acquire(blocking=False):
+            return
+        lock.release()
+
+        def refresh():
+            try:
+                self._refresh(dict(connector_config), connector_info, token_state)
+            except Exception as err:
+                logger.error("Background token refresh failed: {0}".format(err))
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def validate_token(self, connector_config, connector_info):
+        if not connector_config.get('accessToken'):
+            logger.error('Error occurred while connecting server: Unauthorized')
+            raise ConnectorError('Error occurred while connecting server: Unauthorized')
+        token_state = self._adopt_shared_token(connector_config, TokenState.from_config(connector_config))
+        ts_now = time()
+        if token_state.is_expired(ts_now):
+            logger.info("Token expired at {0}".format(token_state.expires_at))
+            self._refresh(connector_config, connector_info, token_state)
+        elif token_state.is_expired(ts_now, self.refresh_skew):
+            logger.info("Token expires at {0}, refreshing in background".format(token_state.expires_at))
+            self._refresh_in_background(connector_config, connector_info, token_state)
         else:
-            logger.info("Token is valid till {0}".format(expires))
-            return "Bearer {0}".format(connector_config.get('accessToken'))
+            logger.debug("Token is valid till {0}".format(token_state.expires_at))
+        return "Bearer {0}".format(connector_config.get('accessToken'))
 
     def acquire_token(self, REFRESH_TOKEN_FLAG):
         try:
@@ -81,7 +163,7 @@ class WhatsUpGoldAuth:
                     "grant_type": "refresh_token",
                     "refresh_token": self.refresh_token
                 }
-            response = request("POST", self.token_url, data=data, verify=self.verify_ssl)
+            response = self.session.post(self.token_url, data=data, verify=self.verify_ssl, timeout=self.timeout)
             if response.status_code in [200, 204, 201]:
                 return response.json()
 